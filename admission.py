@@ -0,0 +1,142 @@
+import asyncio
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+import telemetry
+
+# Evaluations running at once, requests allowed to wait beyond that, per-user share of the queue
+ADMIT_CONCURRENCY = int(os.environ.get("ADMIT_CONCURRENCY", "8"))
+ADMIT_QUEUE = int(os.environ.get("ADMIT_QUEUE", "32"))
+ADMIT_PER_USER = int(os.environ.get("ADMIT_PER_USER", "4"))
+# Seconds a request may wait for a slot before it is turned away
+ADMIT_WAIT = float(os.environ.get("ADMIT_WAIT", "30"))
+
+
+class Busy(Exception):
+    pass
+
+
+def user_key(request):
+    """
+    Identifies the caller of a Gradio handler: session, then client host, else anonymous.
+    """
+    session = getattr(request, "session_hash", None)
+    client = getattr(request, "client", None)
+    return session or getattr(client, "host", None) or "anonymous"
+
+
+# Bounded scheduler in front of the handlers. A fixed number of requests run at once;
+# the rest wait in per-user queues served round-robin, and once the queue is full new
+# requests are rejected immediately instead of piling up into timeouts.
+class AdmissionController:
+    def __init__(self, max_active=None, max_queue=None, per_user=None, max_wait=None):
+        self.max_active = max_active or ADMIT_CONCURRENCY
+        self.max_queue = ADMIT_QUEUE if max_queue is None else max_queue
+        self.per_user = per_user or ADMIT_PER_USER
+        self.max_wait = max_wait or ADMIT_WAIT
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.peak_queue = 0
+        self._waiting = OrderedDict()
+
+    def _reject(self, reason, message):
+        self.rejected += 1
+        telemetry.metrics.inc("rag_admission_rejected_total", reason=reason)
+        raise Busy(message)
+
+    def _dequeue(self, user, future):
+        queue = self._waiting.get(user)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self.queued -= 1
+            if not queue:
+                del self._waiting[user]
+
+    def _grant(self):
+        # Round-robin over users: the user just served goes to the back of the line
+        while self.active < self.max_active and self._waiting:
+            user, queue = next(iter(self._waiting.items()))
+            future = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._waiting.move_to_end(user)
+            else:
+                del self._waiting[user]
+            self.active += 1
+            future.set_result(None)
+
+    async def acquire(self, user="anonymous"):
+        if self.active < self.max_active and not self._waiting:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full", f"Busy: {self.queued} requests are already waiting. Please retry shortly.")
+        if len(self._waiting.get(user, ())) >= self.per_user:
+            self._reject("per_user", f"Busy: you already have {self.per_user} requests waiting.")
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user, deque()).append(future)
+        self.queued += 1
+        self.peak_queue = max(self.peak_queue, self.queued)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self._dequeue(user, future)
+                self._reject("wait", f"Busy: no slot freed up within {self.max_wait:g}s. Please retry shortly.")
+            # Granted in the same tick the wait ran out: keep the slot
+        except asyncio.CancelledError:
+            if future.done():
+                self.release()
+            else:
+                future.cancel()
+                self._dequeue(user, future)
+            raise
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, user="anonymous"):
+        await self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, user, fn):
+        """
+        Awaits `fn()` once admitted; raises Busy when the request is turned away.
+        """
+        async with self.slot(user):
+            return await fn()
+
+    async def stream(self, user, make):
+        """
+        Iterates `make()` once admitted; a turned-away request yields a single ("busy", text) stage.
+        """
+        try:
+            await self.acquire(user)
+        except Busy as e:
+            yield "busy", f"🚦 {e}"
+            return
+        try:
+            async for item in make():
+                yield item
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "peak_queue": self.peak_queue,
+        }
@@ -1,20 +1,35 @@
+import asyncio
 import gradio as gr
+import importlib
 import os
-import asyncio
 from dotenv import load_dotenv
-from mcp_playground import MCPClient
-from smolagents import CodeAgent
-from smolagents.adapters.mcp import MCPAdaptTool
+import telemetry
+from admission import user_key
+from doc_handles import describe_documents
+from eval_app import EvalApp, elapsed
+from eval_tools import SCORING_TOOLS, format_tool_result, split_documents
 
 load_dotenv()
 
 # MCP Server connection
-MCP_SERVER_URL = "https://785e87c0901f815632.gradio.live/gradio_api/mcp/sse"
-client = MCPClient(MCP_SERVER_URL)
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "https://785e87c0901f815632.gradio.live/gradio_api/mcp/sse")
+OPENAI_MODEL = "gpt-4o"
+
+def adapt_tool(tool):
+    # smolagents is imported on first use, not at startup
+    from smolagents.adapters.mcp import MCPAdaptTool
+    return MCPAdaptTool(tool, client=service.client)
+
+# Routing, remembered plans, MCP replicas, caches and admission live in eval_app; this app adds its prompt and agent
+service = EvalApp("app", MCP_SERVER_URL, OPENAI_MODEL, adapt=adapt_tool)
+handles = service.handles
+catalog = service.catalog
 
 # Prompt builder
 def make_prompt(query, documents, task_instruction):
-    doc_list = "\n".join(f"{i+1}. {doc.strip()}" for i, doc in enumerate(documents.split("\n")) if doc.strip())
+    # Documents stay client-side; the LLM only gets a handle to pass as the 'documents' argument
+    docs = split_documents(documents)
+    handle = handles.register(docs)
     return f"""
 You are an advanced retrieval evaluation agent with access to multiple tools via the MCP server.
 
@@ -31,44 +46,56 @@ Available tools:
 
 📌 **Query**: "{query.strip()}"
 
-📄 **Documents**:
-{doc_list}
+📄 **Documents**: {describe_documents(handle, docs)}
 
 🔍 You may use one or more tools to fully satisfy the instruction. Include rationale behind tool selection and show results.
 """
 
-# Async runner using SmolAgent
-async def run_eval(query, documents, task_instruction):
-    message = make_prompt(query, documents, task_instruction)
-    raw_tools = await client.list_tools()
-    tools = [MCPAdaptTool(tool, client=client) for tool in raw_tools]  # ✅ Wrap each MCP tool
+async def warm_tools():
+    # Import smolagents off the loop, then build the adapted tool wrappers once
+    await asyncio.to_thread(importlib.import_module, "smolagents.adapters.mcp")
+    await catalog.adapted()
+
+# The LLM step: a smolagents CodeAgent over the adapted MCP tools
+async def decide(trace, scoped, query, documents, task_instruction, fingerprint):
+    with trace.span("prompt_build"):
+        message = make_prompt(query, documents, task_instruction)
+    with trace.span("tool_discovery"):
+        tools = await catalog.adapted()  # ✅ Wrapped MCP tools, reused across requests
+
+    from smolagents import CodeAgent
 
     agent = CodeAgent(
         tools=tools,
         model={
             "provider": "openai",
-            "model": "gpt-4o",
+            "model": OPENAI_MODEL,
             "api_key": os.environ.get("OPENAI_API_KEY")
         }
     )
 
-    result = await agent.run(message)
+    with trace.span("llm_decision", source="llm"):
+        result = await agent.run(message)
+    telemetry.record_usage(OPENAI_MODEL, agent.monitor.get_total_token_counts())
 
     if result.tool_result:
-        return f"✅ Tool Used: {result.tool_call.name}\n\n📊 Result:\n{result.tool_result.content}"
+        if result.tool_call.name in SCORING_TOOLS:
+            service.plans.put(task_instruction, OPENAI_MODEL, fingerprint, [result.tool_call.name])
+        with trace.span("render", tool=result.tool_call.name):
+            text = format_tool_result(result.tool_call.name, result.tool_result.content)
+        yield "result", text
     else:
-        return f"🤖 No tool was called.\n\nLLM Response:\n{result.response.content}"
+        yield "result", f"🤖 No tool was called.\n\nLLM Response:\n{result.response.content}"
+    yield "summary", f"⏱️ Done in {elapsed(trace):.2f}s"
 
-# Sync Gradio wrapper
-def evaluate(query, documents, task_instruction):
-    return asyncio.run(run_eval(query, documents, task_instruction))
+service.decide = decide
+run_eval = service.run_eval
+list_tools = service.list_tools
 
-# Async Gradio-compatible tool listing
-async def list_tools():
-    tools = await client.list_tools()
-    if not tools:
-        return "⚠️ No tools available or MCP server not reachable."
-    return "🧰 Available Tools:\n" + "\n".join(f"- {tool.name}" for tool in tools)
+# Streaming Gradio handler; the request identifies the user for admission and re-scoring
+async def evaluate(query, documents, task_instruction, request: gr.Request = None):
+    async for output in service.evaluate(query, documents, task_instruction, user_key(request)):
+        yield output
 
 # Gradio UI
 with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
@@ -86,8 +113,11 @@ with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
         eval_btn = gr.Button("🔍 Evaluate")
         list_btn = gr.Button("🧰 List Tools")
 
-    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output)
+    # No Gradio-side per-event limit: the admission controller bounds concurrent evaluations
+    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output, concurrency_limit=None)
     list_btn.click(fn=list_tools, inputs=[], outputs=output)
 
 if __name__ == "__main__":
+    # smolagents' adapted tools are the catalog warm-up here
+    service.start(tool_catalog=warm_tools)
     iface.launch(share=True)
@@ -1,20 +1,25 @@
 import gradio as gr
 import os
-import asyncio
 from dotenv import load_dotenv
-from mcp_playground import MCPClient, OpenAIBridge
+from admission import user_key
+from doc_handles import describe_documents
+from eval_app import EvalApp
+from eval_tools import split_documents
 
 load_dotenv()
 
 # MCP Server connection
-MCP_SERVER_URL = "https://ecb3fb0f503b7d47f5.gradio.live/gradio_api/mcp/sse"
-client = MCPClient(MCP_SERVER_URL)
-bridge = OpenAIBridge(client, api_key=os.environ.get("OPENAI_API_KEY"), model="gpt-4o")
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "https://ecb3fb0f503b7d47f5.gradio.live/gradio_api/mcp/sse")
+OPENAI_MODEL = "gpt-4o"
+# Routing, remembered plans, MCP replicas, caches and admission live in eval_app; this app adds its prompt
+service = EvalApp("app2", MCP_SERVER_URL, OPENAI_MODEL)
+handles = service.handles
 
 # Prompt builder
 def make_prompt(query, documents, task_instruction):
-    # Proper JSON-like array for the 'docs' argument
-    doc_array = "[" + ",\n".join(f'"{doc.strip()}"' for doc in documents.split("\n") if doc.strip()) + "]"
+    # Documents stay client-side; the LLM only gets a handle it passes as 'docs' or 'documents'
+    docs = split_documents(documents)
+    handle = handles.register(docs)
     return f"""
 You are an advanced retrieval evaluation agent with access to multiple tools via the MCP server.
 
@@ -32,42 +37,25 @@ Available tools (you must format inputs exactly using argument names):
 
 📌 query = "{query.strip()}"
 
-📄 documents (pass this to relevant tool as 'docs' or 'documents' argument):
-{doc_array}
+📄 documents: {describe_documents(handle, docs)}
 
 📣 Be sure to call the tool by passing named arguments only.
 """
 
-async def run_eval(query, documents, task_instruction):
-    message = make_prompt(query, documents, task_instruction)
-    result = await bridge.process_query(message)
+# 🩹 HOTFIX: Inject docs if redundancy_checker was called without them, before it runs
+def fix_args(tool, args, docs):
+    if tool == "redundancy_checker" and not args.get("docs"):
+        return {"docs": docs}
+    return args
 
-    # 🩹 HOTFIX: Inject docs if tool is redundancy_checker
-    if result.get("tool_call"):
-        tool = result["tool_call"]["name"]
-        args = result["tool_call"].get("args", {})
+service.use_bridge(make_prompt, fix_args)
+run_eval = service.run_eval
+list_tools = service.list_tools
 
-        if tool == "redundancy_checker" and not args.get("docs"):
-            docs_list = [doc.strip() for doc in documents.split("\n") if doc.strip()]
-            result["tool_call"]["args"] = {"docs": docs_list}
-            result["tool_result"] = await client.invoke(tool, **result["tool_call"]["args"])
-
-        content = result["tool_result"].content
-        return f"✅ Tool Used: {tool}\n\n📊 Result:\n{content}"
-    else:
-        return f"🤖 No tool was called.\n\nLLM Response:\n{result['response'].content}"
-
-
-# Wrapper for evaluation
-def evaluate(query, documents, task_instruction):
-    return asyncio.run(run_eval(query, documents, task_instruction))
-
-# Tool listing
-async def list_tools():
-    tools = await client.list_tools()
-    if not tools:
-        return "⚠️ No tools available or MCP server not reachable."
-    return "🧰 Available Tools:\n" + "\n".join(f"- {tool.name}" for tool in tools)
+# Streaming Gradio handler; the request identifies the user for admission and re-scoring
+async def evaluate(query, documents, task_instruction, request: gr.Request = None):
+    async for output in service.evaluate(query, documents, task_instruction, user_key(request)):
+        yield output
 
 # Gradio UI
 with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
@@ -85,8 +73,10 @@ with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
         eval_btn = gr.Button("🔍 Evaluate")
         list_btn = gr.Button("🧰 List Tools")
 
-    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output)
+    # No Gradio-side per-event limit: the admission controller bounds concurrent evaluations
+    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output, concurrency_limit=None)
     list_btn.click(fn=list_tools, inputs=[], outputs=output)
 
 if __name__ == "__main__":
+    service.start()
     iface.launch(share=True)
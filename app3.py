@@ -1,19 +1,25 @@
 import gradio as gr
 import os
-import asyncio
 from dotenv import load_dotenv
-from mcp_playground import MCPClient, OpenAIBridge
+from admission import user_key
+from doc_handles import describe_documents
+from eval_app import EvalApp
+from eval_tools import split_documents
 
 load_dotenv()
 
 # MCP Server connection
-MCP_SERVER_URL = "https://59d7dd5931ea957432.gradio.live/gradio_api/mcp/sse"
-client = MCPClient(MCP_SERVER_URL)
-bridge = OpenAIBridge(client, api_key=os.environ.get("OPENAI_API_KEY"), model="gpt-4o")
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "https://59d7dd5931ea957432.gradio.live/gradio_api/mcp/sse")
+OPENAI_MODEL = "gpt-4o"
+# Routing, remembered plans, MCP replicas, caches and admission live in eval_app; this app adds its prompt
+service = EvalApp("app3", MCP_SERVER_URL, OPENAI_MODEL)
+handles = service.handles
 
 # Prompt builder
 def make_prompt(query, documents, task_instruction):
-    doc_list = "\n".join(f"{i+1}. {doc.strip()}" for i, doc in enumerate(documents.split("\n")) if doc.strip())
+    # Documents stay client-side; the LLM only gets a handle to pass as the 'documents' argument
+    docs = split_documents(documents)
+    handle = handles.register(docs)
     return f"""
 You are an advanced retrieval evaluation agent with access to multiple tools via the MCP server.
 
@@ -30,37 +36,19 @@ Available tools:
 
 📌 **Query**: "{query.strip()}"
 
-📄 **Documents**:
-{doc_list}
+📄 **Documents**: {describe_documents(handle, docs)}
 
 🔍 You may use one or more tools to fully satisfy the instruction. Include rationale behind tool selection and show results.
 """
 
-# Async runner
-async def run_eval(query, documents, task_instruction):
-    message = make_prompt(query, documents, task_instruction)
-    result = await bridge.process_query(message)
-
-    if result.get("tool_call"):
-        tool = result["tool_call"]["name"]
-        content = result["tool_result"].content
-        return f"✅ Tool Used: {tool}\n\n📊 Result:\n{content}"
-    else:
-        return f"🤖 No tool was called.\n\nLLM Response:\n{result['response'].content}"
-
-# Wrapper for evaluation
-def evaluate(query, documents, task_instruction):
-    return asyncio.run(run_eval(query, documents, task_instruction))
-
-# Tool listing
-# Async Gradio-compatible list_tools
-async def list_tools():
-    tools = await client.list_tools()
-    if not tools:
-        return "⚠️ No tools available or MCP server not reachable."
-    
-    return "🧰 Available Tools:\n" + "\n".join(f"- {tool.name}" for tool in tools)
+service.use_bridge(make_prompt)
+run_eval = service.run_eval
+list_tools = service.list_tools
 
+# Streaming Gradio handler; the request identifies the user for admission and re-scoring
+async def evaluate(query, documents, task_instruction, request: gr.Request = None):
+    async for output in service.evaluate(query, documents, task_instruction, user_key(request)):
+        yield output
 
 # Gradio UI
 with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
@@ -78,8 +66,10 @@ with gr.Blocks(title="RAG Evaluation MCP Client") as iface:
         eval_btn = gr.Button("🔍 Evaluate")
         list_btn = gr.Button("🧰 List Tools")
 
-    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output)
+    # No Gradio-side per-event limit: the admission controller bounds concurrent evaluations
+    eval_btn.click(fn=evaluate, inputs=[query, documents, instruction], outputs=output, concurrency_limit=None)
     list_btn.click(fn=list_tools, inputs=[], outputs=output)
 
 if __name__ == "__main__":
+    service.start()
     iface.launch(share=True)
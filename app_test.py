@@ -1,36 +1,102 @@
+import asyncio
 import gradio as gr
 import json
 import os
-from openai import OpenAI  # ✅ new-style import
 from dotenv import load_dotenv
-from smolagents import CodeAgent, MCPClient
+from admission import ADMIT_CONCURRENCY, AdmissionController, Busy, user_key
+from call_policy import BlockingCalls, CallPolicy
+from eval_tools import evaluation_key
+from fanout import FANOUT_CONCURRENCY, run_plan
+from mcp_runtime import run_async, run_sync, runtime
+import telemetry
+from plan_cache import PlanCache, fill_plan, plan_template
+from result_cache import ResultCache, cached_invoke, result_key
+from single_flight import SingleFlight
+from tool_catalog import ToolCatalog
+from warmup import Lazy, Readiness
 
 # Load environment variables (for OpenAI API key)
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # ✅ new client object
+
+def make_openai_client():
+    from openai import AsyncOpenAI  # ✅ new-style import, deferred: it is the slowest import at startup
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def make_mcp_client():
+    from smolagents import MCPClient
+
+    return MCPClient(
+        {
+            "url": MCP_SERVER_URL,
+            "transport": "sse"
+        }
+    )
 
 # Replace with your actual MCP server URL
-MCP_SERVER_URL = "https://0062f3bbf9d0bc0ced.gradio.live/gradio_api/mcp/sse"
-
-# Initialize MCP client
-mcp_client = MCPClient(
-    {
-        "url": MCP_SERVER_URL,
-        "transport": "sse"
-    }
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "https://0062f3bbf9d0bc0ced.gradio.live/gradio_api/mcp/sse")
+
+# Clients are built on first use (or by the background warm-up), so the UI binds immediately
+client = Lazy(make_openai_client)
+mcp_client = Lazy(make_mcp_client)
+readiness = Readiness()
+
+OPENAI_MODEL = "gpt-4o"
+
+# Persistent tool-result and tool-plan caches shared with the other apps
+result_cache = ResultCache()
+plan_cache = PlanCache()
+# Every evaluator the LLM can pick is read-only, so all of them may be retried
+EVALUATION_TOOLS = (
+    "BM25 Relevance Scorer", "Semantic Relevance Scorer", "Redundancy Checker", "Exact Match Checker",
+    "Repetition Checker", "Semantic Diversity Checker", "Length Consistency Checker",
+    "System Relevance Evaluator", "System Coverage Evaluator",
 )
+# No hedging: the MCP client blocks, and a duplicate call can't be cancelled once it's running
+policy = CallPolicy(idempotent=EVALUATION_TOOLS, hedge=False)
+# MCP calls get their own threads: every admitted request can have a full fan-out in flight
+tool_threads = BlockingCalls(ADMIT_CONCURRENCY * FANOUT_CONCURRENCY)
+# Concurrent identical requests / tool calls share one in-flight result
+decisions = SingleFlight("evaluation")
+tool_flights = SingleFlight("tool_call")
+# Bounded scheduler in front of the UI: fair per-session queueing, immediate "busy" when saturated
+admission = AdmissionController()
+
+# smolagents' MCPClient lists tools synchronously; the catalog expects an async list_tools
+class _ToolSource:
+    url = MCP_SERVER_URL
+
+    async def list_tools(self):
+        return await tool_threads.run(lambda: mcp_client.get().get_tools())
+
+# Tool list and schema fingerprint, refreshed after TOOL_CATALOG_TTL like the other apps'
+catalog = ToolCatalog(_ToolSource())
+
+async def tools_fingerprint():
+    await catalog.tools()
+    return catalog.fingerprint
 
 def list_tools():
     """
     Returns the list of tools available on the MCP server.
     """
-    return json.dumps(mcp_client.list_tools(), indent=2)
+    return json.dumps(mcp_client.get().list_tools(), indent=2)
 
 def llm_decider(instruction: str, query: str, documents: str, generations: str):
     """
     Uses LLM to decide which tool(s) to call on the MCP server based on the given inputs.
     """
-    tool_description_prompt = f'''
+    return run_sync(decide_async(instruction, query, documents, generations))
+
+async def decide_async(instruction, query, documents, generations):
+    # Runs on the background loop; only the blocking MCP client calls leave it, on tool_threads
+    with telemetry.request("app_test", model=OPENAI_MODEL) as trace:
+        key = evaluation_key(query, documents, instruction, generations.strip())
+        return await decisions.do(key, lambda: _llm_decider(trace, instruction, query, documents, generations))
+
+async def _llm_decider(trace, instruction, query, documents, generations):
+    with trace.span("prompt_build"):
+        tool_description_prompt = f'''
 You are an intelligent AI agent tasked with selecting the best evaluation tool(s) for a given task.
 
 Your MCP Server has the following tools available:
@@ -59,27 +125,64 @@ Respond with a JSON list of tool names and arguments. Example:
 ]
 '''
 
-    # ✅ NEW SYNTAX (openai>=1.0.0)
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": tool_description_prompt}],
-        temperature=0.3
-    )
+    # 🧠 Same instruction shape → reuse the remembered plan and skip the LLM
+    inputs = {"query": query, "documents": documents, "generations": generations}
+    with trace.span("tool_discovery"):
+        fingerprint = await tools_fingerprint()
+    with trace.span("llm_decision", source="plan_cache") as decision:
+        template = plan_cache.get(instruction, OPENAI_MODEL, fingerprint)
+
+        if template is not None:
+            tool_calls = fill_plan(template, inputs)
+        else:
+            decision["source"] = "llm"
+            # The client is normally built by the warm-up; otherwise its import stays off the loop
+            llm = client.get() if client.ready else await asyncio.to_thread(client.get)
+            # ✅ NEW SYNTAX (openai>=1.0.0)
+            response = await llm.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[{"role": "user", "content": tool_description_prompt}],
+                temperature=0.3
+            )
+            telemetry.record_usage(OPENAI_MODEL, response.usage)
+
+            tool_calls = json.loads(response.choices[0].message.content)
+            plan_cache.put(instruction, OPENAI_MODEL, fingerprint, plan_template(tool_calls, inputs))
+
+    async def call_tool(tool, args):
+        with trace.span("tool_call", tool=tool, source="cache") as span:
+            async def remote():
+                span["source"] = "remote"
+                result = await policy.call(tool, lambda: tool_threads.run(lambda: mcp_client.get().call_tool(tool, args)))
+                telemetry.record_bytes(tool, telemetry.payload_bytes(args), telemetry.payload_bytes(result), span)
+                return result
+            return await tool_flights.do(
+                result_key(tool, args, fingerprint, MCP_SERVER_URL),
+                lambda: cached_invoke(result_cache, tool, args, fingerprint, remote, url=MCP_SERVER_URL),
+            )
 
-    tool_calls = json.loads(response.choices[0].message.content)
+    # ⚡ Run the plan's calls concurrently; failed tools return an error entry, order is preserved.
+    # The policy owns the deadline (and retries within it), so run_plan adds no timeout of its own.
+    with trace.span("tool_execution", tools=len(tool_calls)):
+        results = await run_plan(tool_calls, call_tool, timeout=0)
 
-    results = []
-    for call in tool_calls:
-        result = mcp_client.call_tool(call["tool"], call["args"])
-        results.append({"tool": call["tool"], "result": result})
+    with trace.span("render"):
+        return json.dumps(results, indent=2)
 
-    return json.dumps(results, indent=2)
+# Native async Gradio handler: the decision runs on the background loop once admitted
+async def decide(instruction, query, documents, generations, request: gr.Request = None):
+    try:
+        return await run_async(admission.run(
+            user_key(request), lambda: decide_async(instruction, query, documents, generations),
+        ))
+    except Busy as e:
+        return json.dumps({"error": f"🚦 {e}"}, indent=2, ensure_ascii=False)
 
 # Gradio interface
 demo = gr.TabbedInterface(
     [
         gr.Interface(
-            fn=llm_decider,
+            fn=decide,
             inputs=[
                 gr.Textbox(label="Instruction", lines=2),
                 gr.Textbox(label="Query", lines=2),
@@ -87,7 +190,8 @@ demo = gr.TabbedInterface(
                 gr.Textbox(label="Generations", lines=6)
             ],
             outputs=gr.Code(label="Tool Calls and Results (JSON)"),
-            title="🧠 LLM Decision Agent"
+            title="🧠 LLM Decision Agent",
+            concurrency_limit=None,
         ),
         gr.Interface(
             fn=list_tools,
@@ -99,4 +203,11 @@ demo = gr.TabbedInterface(
     tab_names=["LLM Agent", "List Tools"]
 )
 
-demo.launch(share=True)
+if __name__ == "__main__":
+    telemetry.start_metrics_server()
+    # The UI binds right away; the clients and the tool fingerprint are built behind it
+    runtime.submit(readiness.run({
+        "mcp_tools": tools_fingerprint,
+        "llm_client": lambda: asyncio.to_thread(client.get),
+    }))
+    demo.launch(share=True)
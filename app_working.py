@@ -1,19 +1,25 @@
 import gradio as gr
 import os
-import asyncio
 from dotenv import load_dotenv
-from mcp_playground import MCPClient, OpenAIBridge
+from admission import user_key
+from doc_handles import describe_documents
+from eval_app import EvalApp
+from eval_tools import split_documents
 
 load_dotenv()
 
 # Initialize MCP client and bridge
-MCP_SERVER_URL = "https://59d7dd5931ea957432.gradio.live/gradio_api/mcp/sse"
-client = MCPClient(MCP_SERVER_URL)
-bridge = OpenAIBridge(client, api_key=os.environ.get("OPENAI_API_KEY"), model="gpt-4o")
+MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "https://59d7dd5931ea957432.gradio.live/gradio_api/mcp/sse")
+OPENAI_MODEL = "gpt-4o"
+# Routing, remembered plans, MCP replicas, caches and admission live in eval_app; this app adds its prompt
+service = EvalApp("app_working", MCP_SERVER_URL, OPENAI_MODEL)
+handles = service.handles
 
 # Compositional prompt template with instruction
 def make_prompt(query, documents, task_instruction):
-    doc_list = "\n".join(f"{i+1}. {doc.strip()}" for i, doc in enumerate(documents.split("\n")) if doc.strip())
+    # Documents stay client-side; the LLM only gets a handle to pass as the 'documents' argument
+    docs = split_documents(documents)
+    handle = handles.register(docs)
     return f"""
 You are an advanced retrieval evaluation agent with access to multiple tools via the MCP server.
 
@@ -30,27 +36,18 @@ Available tools:
 
 📌 **Query**: "{query.strip()}"
 
-📄 **Documents**:
-{doc_list}
+📄 **Documents**: {describe_documents(handle, docs)}
 
 🔍 You may use one or more tools to fully satisfy the instruction. Include rationale behind tool selection and show results.
 """
 
-# Async query runner
-async def run_eval(query, documents, task_instruction):
-    message = make_prompt(query, documents, task_instruction)
-    result = await bridge.process_query(message)
+service.use_bridge(make_prompt)
+run_eval = service.run_eval
 
-    if result.get("tool_call"):
-        tool = result["tool_call"]["name"]
-        content = result["tool_result"].content
-        return f"✅ Tool Used: {tool}\n\n📊 Result:\n{content}"
-    else:
-        return f"🤖 No tool was called.\n\nLLM Response:\n{result['response'].content}"
-
-# Wrapper for Gradio
-def evaluate(query, documents, task_instruction):
-    return asyncio.run(run_eval(query, documents, task_instruction))
+# Streaming Gradio handler; the request identifies the user for admission and re-scoring
+async def evaluate(query, documents, task_instruction, request: gr.Request = None):
+    async for output in service.evaluate(query, documents, task_instruction, user_key(request)):
+        yield output
 
 # Gradio UI
 iface = gr.Interface(
@@ -62,8 +59,11 @@ iface = gr.Interface(
     ],
     outputs=gr.Textbox(label="Evaluation Result", lines=20),
     title="🔍 RAG Evaluation Agent (Instruction-Guided)",
-    description="Instruct the agent on what to evaluate (redundancy, relevance, match). It will use appropriate MCP tools."
+    description="Instruct the agent on what to evaluate (redundancy, relevance, match). It will use appropriate MCP tools.",
+    # No Gradio-side per-event limit: the admission controller bounds concurrent evaluations
+    concurrency_limit=None,
 )
 
 if __name__ == "__main__":
+    service.start()
     iface.launch(share=True)
@@ -0,0 +1,180 @@
+"""
+Headless batch evaluation over a JSONL or CSV dataset.
+
+Each row needs `query`, `documents` (a list or one document per line) and
+`instruction` (or `task_instruction`); an optional `id` is used for resuming.
+Results are appended to a JSONL file as they finish, so an interrupted run
+picks up where it stopped when started again with the same output path.
+Each row is written once, after its last attempt: failures are retried in the
+run (BATCH_ATTEMPTS), and rows that still failed are dropped from the file and
+retried when the run is started again.
+
+    python batch_eval.py rows.jsonl results.jsonl --app app2 --concurrency 8
+
+With --exact-match-index, a first pass collects every query in the file and the
+in-process exact_match_checker answers from one Aho-Corasick automaton over all
+of them, scanning each distinct document once instead of once per query.
+"""
+import argparse
+import asyncio
+import csv
+import importlib
+import json
+import os
+import sys
+import time
+
+import local_tools
+from exact_match import ExactMatchIndex
+from mcp_runtime import run_sync
+
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+# Attempts per row before its error is written
+BATCH_ATTEMPTS = int(os.environ.get("BATCH_ATTEMPTS", "2"))
+
+
+def read_rows(path):
+    """
+    Streams (row_id, row) pairs without loading the whole file.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for index, row in enumerate(rows):
+            yield str(row.get("id", index)), row
+
+
+def load_checkpoint(path):
+    """
+    Returns the ids already evaluated successfully. Rows that failed are removed so their
+    retry is the only record, and a torn last line is trimmed.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    kept = []
+    dropped = False
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                dropped = True
+                break
+            if not line.endswith(b"\n"):
+                dropped = True
+                break
+            if "output" in record:
+                done.add(record["id"])
+                kept.append(line)
+            else:
+                dropped = True
+    if dropped:
+        # Rewritten beside the original and swapped in, so a crash here loses nothing
+        with open(path + ".tmp", "wb") as f:
+            f.writelines(kept)
+        os.replace(path + ".tmp", path)
+    return done
+
+
+def _row_inputs(row):
+    documents = row.get("documents", "")
+    if isinstance(documents, list):
+        documents = "\n".join(documents)
+    instruction = row.get("instruction") or row.get("task_instruction") or ""
+    return row.get("query", ""), documents, instruction
+
+
+async def run_batch(rows, run_eval, output_path, concurrency=None, done=frozenset(), report_every=100, attempts=None):
+    """
+    Evaluates rows with bounded concurrency, appending one JSON line per row once it
+    succeeds or has used up its attempts.
+    """
+    concurrency = concurrency or BATCH_CONCURRENCY
+    attempts = attempts or BATCH_ATTEMPTS
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def write(record):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            finished = counts["ok"] + counts["error"]
+            if finished % report_every == 0:
+                rate = finished / (time.monotonic() - started)
+                print(f"📦 {finished} rows ({counts['error']} errors), {rate:.1f} rows/s", file=sys.stderr)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                row_id, row = item
+                query, documents, instruction = _row_inputs(row)
+                record = {"id": row_id, "query": query, "instruction": instruction}
+                for attempt in range(1, attempts + 1):
+                    try:
+                        record["output"] = await run_eval(query, documents, instruction)
+                        record.pop("error", None)
+                        counts["ok"] += 1
+                        break
+                    except Exception as e:
+                        record["error"] = str(e)
+                        if attempt < attempts:
+                            await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+                else:
+                    counts["error"] += 1
+                record["attempts"] = attempt
+                write(record)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        for row_id, row in rows:
+            if row_id in done:
+                counts["skipped"] += 1
+                continue
+            await queue.put((row_id, row))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    counts["seconds"] = round(time.monotonic() - started, 3)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch RAG evaluation over a JSONL/CSV dataset")
+    parser.add_argument("input", help="JSONL or CSV file of rows")
+    parser.add_argument("output", help="JSONL results file, also used as the checkpoint")
+    parser.add_argument("--app", default="app2", help="App module providing run_eval (app, app2, app3, app_working)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--attempts", type=int, default=BATCH_ATTEMPTS, help="Attempts per row before its error is written")
+    parser.add_argument("--exact-match-index", action="store_true", help="Index all queries for exact_match_checker")
+    parser.add_argument(
+        "--normalize", default=None,
+        help="With --exact-match-index: any of case,whitespace,punctuation (default EXACT_MATCH_NORMALIZE)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.exact_match_index:
+        normalization = args.normalize.split(",") if args.normalize is not None else None
+        index = ExactMatchIndex((row.get("query", "") for _, row in read_rows(args.input)), normalization)
+        local_tools.use_exact_match_index(index)
+        print(f"🔎 Exact-match index: {index.stats()['queries']} queries", file=sys.stderr)
+
+    app = importlib.import_module(args.app)
+    done = load_checkpoint(args.output)
+    if done:
+        print(f"↩️ Resuming: {len(done)} rows already evaluated", file=sys.stderr)
+
+    counts = run_sync(run_batch(read_rows(args.input), app.run_eval, args.output, args.concurrency, done, attempts=args.attempts))
+    if args.exact_match_index:
+        counts["exact_match_index"] = index.stats()
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
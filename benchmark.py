@@ -0,0 +1,480 @@
+"""
+Offline end-to-end benchmark: local stand-in MCP server + scripted fake model.
+
+Drives an app's run_eval (app, app2, app3, app_working) or app_test's
+llm_decider at several concurrency levels and reports p50/p95/p99 latency,
+throughput and peak RSS. Results are written as JSON so runs can be diffed.
+
+    python benchmark.py --app app2 --concurrency 1,4,16 --requests 64
+    python benchmark.py --startup --runs 5
+    python benchmark.py --cascade --cascade-k 10,25,50,100 --cascade-docs 500
+    python benchmark.py --compare bench_results/old.json bench_results/new.json
+
+Each concurrency level runs in a fresh interpreter with its own empty caches,
+so a level never benefits from results, plans or sessions left by the one before.
+A level where every request failed is flagged and makes the run exit non-zero.
+
+--startup times `import <module>` for each app and helper module in fresh
+interpreters (python -X importtime), with the heaviest imports it pulls in.
+--cascade measures the BM25 -> semantic cascade: latency against recall@N of the
+full semantic ranking, for each top-k. It needs EMBEDDER set to a semantic model:
+the default HashingEmbedder is lexical itself, so its "recall" only says how well
+BM25 agrees with another bag of words. --hashing-embedder runs it anyway, with the
+result marked hashing-only.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DOCUMENTS = [
+    "Green tea contains antioxidants that help reduce inflammation.",
+    "It is commonly consumed in East Asia and has cultural significance.",
+    "Studies show green tea may aid in weight loss and improve brain function.",
+    "Black tea is made from fermented leaves and contains more caffeine.",
+    "Green tea contains antioxidants which help to reduce inflammation.",
+]
+
+# Stock phrases the router handles plus free-form ones that need the model
+WORKLOAD = [
+    ("What are the benefits of drinking green tea?", "Evaluate for redundancy"),
+    ("What are the benefits of drinking green tea?", "Evaluate the relevance of the documents"),
+    ("green tea", "Check for an exact match"),
+    ("Does green tea help with weight loss?", "Evaluate the semantic correctness"),
+    ("What are the benefits of drinking green tea?", "Tell me which passages a student should read first"),
+    ("Is black tea healthier than green tea?", "How good is this retrieval run?"),
+]
+
+
+# Modules timed by --startup: what `python <app>.py` pays before the UI binds
+STARTUP_MODULES = [
+    "app", "app2", "app3", "app_working", "app_test",
+    "telemetry", "mcp_runtime", "replica_pool", "eval_client", "eval_tools", "local_tools",
+    "embedding_store", "router", "warmup",
+]
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return None
+    # Nearest-rank percentile
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, wall, errors, concurrency):
+    ordered = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        # Nothing succeeded: the latencies say nothing about the app
+        "failed": bool(errors) and not latencies,
+        "first_error": errors[0] if errors else None,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "mean": sum(ordered) / len(ordered) if ordered else None,
+        "throughput": len(latencies) / wall if wall else None,
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"Stand-in server did not start on port {port}")
+
+
+def start_backends(tool_latency, llm_latency, replicas=1):
+    """
+    Starts `replicas` stand-in MCP servers and the fake model and points the apps at them via env.
+    Returns the server subprocesses so the caller can stop them.
+    """
+    import fake_llm
+
+    servers, urls = [], []
+    for _ in range(replicas):
+        port = _free_port()
+        servers.append(subprocess.Popen(
+            [sys.executable, "stub_mcp_server.py", "--port", str(port), "--latency", str(tool_latency)],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ))
+        urls.append(f"http://127.0.0.1:{port}/sse")
+        _wait_for_port(port)
+    llm_port = _free_port()
+    fake_llm.serve(llm_port, llm_latency, background=True)
+
+    os.environ["MCP_SERVER_URL"] = urls[0]
+    os.environ["MCP_SERVER_URLS"] = ",".join(urls)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{llm_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "offline-benchmark"
+    return servers
+
+
+def state_env(state_dir):
+    # Cold, throwaway caches so every level starts from the same state
+    return {
+        "RESULT_CACHE_PATH": os.path.join(state_dir, "tool_results.sqlite"),
+        "PLAN_CACHE_PATH": os.path.join(state_dir, "tool_plans.sqlite"),
+        "EMBEDDING_STORE_PATH": os.path.join(state_dir, "embeddings"),
+    }
+
+
+def workload(n):
+    documents = "\n".join(DOCUMENTS)
+    for i in range(n):
+        query, instruction = WORKLOAD[i % len(WORKLOAD)]
+        yield query, documents, instruction
+
+
+def bench_run_eval(run_eval, concurrency, n):
+    from mcp_runtime import run_sync
+
+    async def level():
+        limit = asyncio.Semaphore(concurrency)
+        latencies, errors = [], []
+
+        async def one(args):
+            async with limit:
+                started = time.perf_counter()
+                try:
+                    await run_eval(*args)
+                    latencies.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(args) for args in workload(n)])
+        return latencies, time.perf_counter() - started, errors
+
+    return run_sync(level())
+
+
+def bench_llm_decider(llm_decider, concurrency, n):
+    latencies, errors = [], []
+
+    def one(args):
+        query, documents, instruction = args
+        started = time.perf_counter()
+        llm_decider(instruction, query, documents, "")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(one, args) for args in workload(n)]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+    return latencies, time.perf_counter() - started, errors
+
+
+def import_profile(module, runs):
+    """
+    Imports `module` in `runs` fresh interpreters under -X importtime. Returns the median
+    cumulative import time and the direct imports that cost the most, or the error.
+    """
+    env = dict(os.environ, METRICS_PORT="0")
+    totals, heaviest = [], {}
+    for _ in range(runs):
+        done = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        if done.returncode:
+            return {"module": module, "error": done.stderr.strip().splitlines()[-1]}
+        for line in done.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            # Two spaces of indent per nesting level; level 1 are the module's own imports
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            name = name.strip()
+            if name == module and depth == 0:
+                totals.append(int(cumulative) / 1e6)
+            elif depth == 1:
+                heaviest.setdefault(name, []).append(int(cumulative) / 1e6)
+    top = sorted(((sorted(t)[len(t) // 2], n) for n, t in heaviest.items()), reverse=True)[:5]
+    return {
+        "module": module,
+        "seconds": sorted(totals)[len(totals) // 2] if totals else None,
+        "heaviest": [{"module": name, "seconds": seconds} for seconds, name in top],
+    }
+
+
+def bench_startup(modules, runs):
+    results = []
+    for module in modules:
+        results.append(import_profile(module, runs))
+        report = results[-1]
+        if "error" in report:
+            print(f"{module:>16}  ❌ {report['error']}")
+        else:
+            heavy = ", ".join(f"{h['module']} {h['seconds']:.3f}s" for h in report["heaviest"][:3])
+            print(f"{module:>16}  {report['seconds']:.3f}s  ({heavy})")
+    return results
+
+
+def cascade_rows(n_docs, seed=7):
+    """
+    Synthetic candidate sets: the benchmark's documents among filler sentences drawn
+    from the same vocabulary, one set per distinct workload query.
+    """
+    rng = random.Random(seed)
+    words = sorted({word for doc in DOCUMENTS for word in doc.lower().rstrip(".").split()})
+    filler = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+        for _ in range(max(0, n_docs - len(DOCUMENTS)))
+    ]
+    for query in dict.fromkeys(query for query, _ in WORKLOAD):
+        docs = DOCUMENTS + filler
+        rng.shuffle(docs)
+        yield {"query": query, "documents": docs}
+
+
+def bench_cascade(rows, ks, recall_at, per_doc_latency):
+    """
+    For each k: lexical prefilter + embedding of the survivors, timed per candidate set,
+    and recall@N of the full semantic ranking. `per_doc_latency` models a remote scorer's
+    per-document cost on top of the measured time.
+    """
+    from cascade import prefilter
+    from embedding_store import cosine_scores, load_embedder
+    from local_tools import BM25Index, _as_list
+
+    embedder = load_embedder()
+    sets = []
+    for row in rows:
+        docs = _as_list(row["documents"])
+        vectors = embedder([row["query"]] + docs)
+        reference = cosine_scores(vectors[0], vectors[1:])
+        sets.append((row["query"], docs, set(sorted(range(len(docs)), key=lambda i: -reference[i])[:recall_at])))
+
+    levels = []
+    for k in ks:
+        latencies, recalls, embedded = [], [], []
+        for query, docs, relevant in sets:
+            started = time.perf_counter()
+            lexical = BM25Index(docs).scores(query) if k else None
+            survivors = prefilter(lexical, k).tolist() if k else list(range(len(docs)))
+            embedder([query] + [docs[i] for i in survivors])
+            latencies.append(time.perf_counter() - started + per_doc_latency * len(survivors))
+            recalls.append(len(relevant.intersection(survivors)) / len(relevant) if relevant else 1.0)
+            embedded.append(len(survivors))
+        ordered = sorted(latencies)
+        levels.append({
+            "k": k or "all",
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "recall": sum(recalls) / len(recalls),
+            "embedded": sum(embedded) / len(embedded),
+        })
+        print(json.dumps(levels[-1]))
+    return levels
+
+
+def compare_cascade(old, new):
+    # Older results predate the flag; they were all HashingEmbedder runs unless EMBEDDER was set
+    for name, result in (("old", old), ("new", new)):
+        if result["settings"].get("hashing_only", True):
+            print(f"⚠️ {name} is a hashing-only run: its recall is against a lexical ranking")
+    print(f"{'k':>6} {'metric':>8} {'old':>10} {'new':>10}")
+    previous = {level["k"]: level for level in old["cascade"]}
+    for level in new["cascade"]:
+        before = previous.get(level["k"])
+        if before is None:
+            continue
+        for metric in ("p50", "p95", "recall"):
+            print(f"{level['k']:>6} {metric:>8} {before[metric]:>10.4f} {level[metric]:>10.4f}")
+
+
+def compare_startup(old, new):
+    print(f"{'module':>16} {'old':>10} {'new':>10} {'change':>8}")
+    previous = {entry["module"]: entry for entry in old["startup"]}
+    for entry in new["startup"]:
+        a, b = previous.get(entry["module"], {}).get("seconds"), entry.get("seconds")
+        change = f"{(b - a) / a:+.1%}" if a and b is not None else "n/a"
+        print(f"{entry['module']:>16} {a or 0:>10.4f} {b or 0:>10.4f} {change:>8}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if "startup" in new:
+        compare_startup(old, new)
+        return
+    if "cascade" in new:
+        compare_cascade(old, new)
+        return
+    print(f"{'conc':>5} {'metric':>10} {'old':>10} {'new':>10} {'change':>8}")
+    previous = {level["concurrency"]: level for level in old["levels"]}
+    for level in new["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+        for metric in ("p50", "p95", "p99", "throughput"):
+            a, b = before[metric], level[metric]
+            change = f"{(b - a) / a:+.1%}" if a and b is not None else "n/a"
+            print(f"{level['concurrency']:>5} {metric:>10} {a or 0:>10.4f} {b or 0:>10.4f} {change:>8}")
+    print(f"peak RSS: {old['peak_rss_bytes'] / 2**20:.1f} MiB -> {new['peak_rss_bytes'] / 2**20:.1f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline RAG evaluation benchmark")
+    parser.add_argument("--app", default="app2", help="app, app2, app3, app_working (run_eval) or app_test (llm_decider)")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=48, help="Requests per concurrency level")
+    parser.add_argument("--replicas", type=int, default=1, help="Stand-in MCP servers behind the replica pool")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Seconds added per MCP tool call")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake model completion")
+    parser.add_argument("--out", default="bench_results", help="Directory for the JSON result")
+    parser.add_argument("--startup", action="store_true", help="Time module imports in fresh interpreters instead")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module for --startup")
+    parser.add_argument("--cascade", action="store_true", help="Latency vs recall of the BM25 -> semantic cascade instead")
+    parser.add_argument("--cascade-k", default="10,25,50,100", help="Comma-separated top-k values for --cascade")
+    parser.add_argument("--cascade-docs", type=int, default=500, help="Synthetic candidate set size for --cascade")
+    parser.add_argument("--cascade-data", help="JSONL/CSV rows with query and documents instead of synthetic sets")
+    parser.add_argument("--recall-at", type=int, default=10, help="Recall is measured on the full ranking's top N")
+    parser.add_argument("--per-doc-latency", type=float, default=0.0, help="Seconds added per document embedded")
+    parser.add_argument(
+        "--hashing-embedder", action="store_true",
+        help="Allow --cascade without EMBEDDER; recall is then against a lexical ranking and marked hashing-only",
+    )
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Diff two saved results and exit")
+    # Internal: one concurrency level in this interpreter, reported as a JSON line
+    parser.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.level:
+        app = importlib.import_module(args.app)
+        if hasattr(app, "run_eval"):
+            latencies, wall, errors = bench_run_eval(app.run_eval, args.level, args.requests)
+        else:
+            latencies, wall, errors = bench_llm_decider(app.llm_decider, args.level, args.requests)
+        print(json.dumps({**summarize(latencies, wall, errors, args.level), "peak_rss_bytes": peak_rss_bytes()}))
+        return
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.cascade:
+        from embedding_store import EMBEDDER
+
+        if not EMBEDDER and not args.hashing_embedder:
+            raise SystemExit(
+                "❌ --cascade measures recall against a semantic ranking: set EMBEDDER to a semantic model "
+                "(or pass --hashing-embedder for a lexical, hashing-only run)"
+            )
+        if args.cascade_data:
+            from batch_eval import read_rows
+
+            rows = [row for _, row in read_rows(args.cascade_data)]
+        else:
+            rows = list(cascade_rows(args.cascade_docs))
+        ks = [0] + [int(k) for k in args.cascade_k.split(",")]
+        result = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {
+                "sets": len(rows), "recall_at": args.recall_at, "per_doc_latency": args.per_doc_latency,
+                "embedder": EMBEDDER or "hashing", "hashing_only": not EMBEDDER,
+            },
+            "cascade": bench_cascade(rows, ks, args.recall_at, args.per_doc_latency),
+        }
+        if not EMBEDDER:
+            print("⚠️ Hashing-only run: recall is BM25 against a lexical ranking, not a semantic one")
+        path = os.path.join(args.out, f"cascade-{stamp}.json")
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"📈 Saved {path}")
+        return
+
+    if args.startup:
+        result = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "runs": args.runs,
+            "startup": bench_startup(STARTUP_MODULES, args.runs),
+        }
+        path = os.path.join(args.out, f"startup-{stamp}.json")
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"📈 Saved {path}")
+        return
+    # Per-request JSON spans land next to the result, for a stage-by-stage look at the tail
+    os.environ["TELEMETRY_LOG"] = os.path.join(args.out, f"{args.app}-{stamp}.requests.jsonl")
+    os.environ["METRICS_PORT"] = "0"
+
+    servers = start_backends(args.tool_latency, args.llm_latency, args.replicas)
+    try:
+        levels = []
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            # Fresh interpreter and empty caches per level: nothing warmed by the previous level
+            with tempfile.TemporaryDirectory() as state_dir:
+                done = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--app", args.app,
+                     "--level", str(concurrency), "--requests", str(args.requests)],
+                    capture_output=True, text=True, env=dict(os.environ, **state_env(state_dir)),
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                )
+            if done.returncode:
+                raise SystemExit(f"❌ Level {concurrency} crashed:\n{done.stderr.strip()}")
+            levels.append(json.loads(done.stdout.strip().splitlines()[-1]))
+            print(json.dumps(levels[-1]))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "app": args.app,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"replicas": args.replicas, "tool_latency": args.tool_latency, "llm_latency": args.llm_latency, "requests": args.requests},
+        "levels": levels,
+        "peak_rss_bytes": max(level.pop("peak_rss_bytes") for level in levels),
+    }
+    path = os.path.join(args.out, f"{args.app}-{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"📈 Saved {path} (peak RSS {result['peak_rss_bytes'] / 2**20:.1f} MiB)")
+    failed = [level for level in levels if level["failed"]]
+    if failed:
+        raise SystemExit(
+            f"❌ Every request failed at concurrency {[level['concurrency'] for level in failed]}: {failed[0]['first_error']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+from eval_tools import SCORING_TOOLS
+from fanout import TOOL_TIMEOUT
+from mcp_runtime import is_connection_error
+
+# Per-tool deadlines in seconds, e.g. "semantic_relevance_scorer=20,redundancy_checker=60"; others use TOOL_TIMEOUT
+TOOL_DEADLINES = os.environ.get("TOOL_DEADLINES", "")
+# Retries for idempotent tools after timeouts and connection errors, with full-jitter exponential backoff starting at RETRY_BACKOFF seconds
+TOOL_RETRIES = int(os.environ.get("TOOL_RETRIES", "2"))
+RETRY_BACKOFF = float(os.environ.get("RETRY_BACKOFF", "0.25"))
+# Hedged requests: once a call outlives the tool's p95 latency, a duplicate is sent and the first reply wins
+HEDGE_REQUESTS = os.environ.get("HEDGE_REQUESTS", "0") == "1"
+HEDGE_QUANTILE = float(os.environ.get("HEDGE_QUANTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+
+
+def parse_deadlines(spec):
+    deadlines = {}
+    for item in spec.split(","):
+        if "=" in item:
+            tool, seconds = item.split("=", 1)
+            deadlines[tool.strip()] = float(seconds)
+    return deadlines
+
+
+# Recent successful latencies for one tool, used to pick the hedge delay
+class LatencyWindow:
+    def __init__(self, size=256):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def quantile(self, q):
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+# Deadlines, retries and hedging around a single tool call
+class CallPolicy:
+    def __init__(self, deadlines=None, retries=None, backoff=None, hedge=None, idempotent=SCORING_TOOLS,
+                 default_deadline=None):
+        self.deadlines = parse_deadlines(TOOL_DEADLINES) if deadlines is None else dict(deadlines)
+        self.default_deadline = TOOL_TIMEOUT if default_deadline is None else default_deadline
+        self.retries = TOOL_RETRIES if retries is None else retries
+        self.backoff = RETRY_BACKOFF if backoff is None else backoff
+        self.hedge = HEDGE_REQUESTS if hedge is None else hedge
+        self.idempotent = frozenset(idempotent)
+        self.latencies = {}
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def deadline(self, tool):
+        return self.deadlines.get(tool, self.default_deadline)
+
+    def hedge_delay(self, tool):
+        """
+        Seconds to wait before hedging a call, or None when hedging does not apply yet.
+        """
+        window = self.latencies.get(tool)
+        if not self.hedge or tool not in self.idempotent or window is None or len(window) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, window.quantile(HEDGE_QUANTILE))
+
+    async def call(self, tool, attempt):
+        """
+        Runs `attempt()` (a fresh awaitable per call) within the tool's deadline. Idempotent
+        tools are retried with jittered backoff while the deadline allows, and hedged if enabled.
+        Only timeouts and connection errors are retried: a tool error would fail the same way again.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = self.deadline(tool)
+        expires = loop.time() + deadline
+        retries = self.retries if tool in self.idempotent else 0
+        for n in range(retries + 1):
+            remaining = expires - loop.time()
+            try:
+                return await asyncio.wait_for(self._hedged(tool, attempt), remaining)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and loop.time() >= expires:
+                    self.timeouts += 1
+                    telemetry.metrics.inc("rag_tool_timeouts_total", tool=tool)
+                    raise TimeoutError(f"{tool} exceeded its {deadline:g}s deadline") from None
+                if not is_connection_error(e):
+                    self.failures += 1
+                    raise
+                pause = random.uniform(0, self.backoff * 2 ** n)
+                if n == retries or loop.time() + pause >= expires:
+                    self.failures += 1
+                    raise
+            self.retried += 1
+            telemetry.metrics.inc("rag_tool_retries_total", tool=tool)
+            await asyncio.sleep(pause)
+
+    async def _timed(self, tool, attempt):
+        started = time.monotonic()
+        result = await attempt()
+        self.latencies.setdefault(tool, LatencyWindow()).add(time.monotonic() - started)
+        return result
+
+    async def _hedged(self, tool, attempt):
+        delay = self.hedge_delay(tool)
+        if delay is None:
+            return await self._timed(tool, attempt)
+        first = asyncio.ensure_future(self._timed(tool, attempt))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                # The pool sends the duplicate to the least busy session or replica
+                self.hedged += 1
+                telemetry.metrics.inc("rag_tool_hedges_total", tool=tool)
+                tasks.add(asyncio.ensure_future(self._timed(tool, attempt)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                if not tasks:
+                    raise done.pop().exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self):
+        return {
+            "retries": self.retried,
+            "hedges": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+# Dedicated threads for a blocking tool client (smolagents' MCPClient). A thread can't be
+# cancelled: a call abandoned at its deadline holds its worker until it returns, so these
+# calls get their own bounded executor instead of starving asyncio.to_thread's default one.
+class BlockingCalls:
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="tool-call")
+
+    def run(self, fn, *args, **kwargs):
+        return asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,123 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+import telemetry
+from local_tools import _as_list, bm25_scores, format_results
+from result_decoder import decode
+
+# Documents BM25 passes on to semantic_relevance_scorer; 0 keeps every document
+CASCADE_TOP_K = int(os.environ.get("CASCADE_TOP_K", "0"))
+# Minimum BM25 score to reach the semantic stage; unset keeps every document
+CASCADE_MIN_SCORE = float(os.environ["CASCADE_MIN_SCORE"]) if os.environ.get("CASCADE_MIN_SCORE") else None
+# Smaller sets always go to the semantic scorer whole
+CASCADE_MIN_DOCS = int(os.environ.get("CASCADE_MIN_DOCS", "20"))
+
+
+def prefilter(scores, top_k=0, min_score=None):
+    """
+    Indices of the documents that survive the lexical stage, in document order.
+    """
+    keep = np.ones(len(scores), dtype=bool)
+    if min_score is not None:
+        keep &= scores >= min_score
+    if top_k and top_k < len(scores):
+        # Stable sort: ties keep document order, like the rest of the ranking code
+        ranked = np.argsort(-scores, kind="stable")
+        top = np.zeros(len(scores), dtype=bool)
+        top[ranked[:top_k]] = True
+        keep &= top
+    return np.flatnonzero(keep)
+
+
+# Retrieval-style cascade in front of semantic_relevance_scorer: BM25 over the submitted
+# documents runs in-process and only the top-k / above-threshold survivors are embedded.
+# Rows carry the stage that decided them; pruned documents keep their BM25 score.
+class CascadeSession:
+    def __init__(self, cascade, client):
+        self.cascade = cascade
+        self.client = client
+
+    @property
+    def handles(self):
+        return self.client.handles
+
+    async def list_tools(self):
+        return await self.client.list_tools()
+
+    async def invoke(self, tool, **kwargs):
+        if tool != "semantic_relevance_scorer":
+            return await self.client.invoke(tool, **kwargs)
+        expanded = self.handles.expand(kwargs) if self.handles is not None else kwargs
+        query, documents = expanded.get("query"), expanded.get("documents")
+        if not isinstance(query, str) or not isinstance(documents, list):
+            return await self.client.invoke(tool, **kwargs)
+        docs = _as_list(documents)
+        if len(docs) < self.cascade.min_docs:
+            return await self.client.invoke(tool, **kwargs)
+
+        with telemetry.span("cascade_prefilter", docs=len(docs)) as span:
+            # BM25 over the whole set is CPU work: off the shared event loop
+            lexical = await asyncio.to_thread(bm25_scores, query, docs)
+            survivors = prefilter(lexical, self.cascade.top_k, self.cascade.min_score)
+            span["survivors"] = len(survivors)
+        self.cascade._record(len(docs), len(survivors))
+        if len(survivors) == len(docs):
+            return await self.client.invoke(tool, **kwargs)
+
+        semantic = {}
+        if len(survivors):
+            result = await self.client.invoke(tool, **{**expanded, "documents": [docs[i] for i in survivors]})
+            scored = decode(result.content)
+            # Scores are matched by document text, never by position
+            by_document = dict(zip(
+                (doc.strip() for doc in getattr(scored, "documents", ())), getattr(scored, "scores", ()),
+            ))
+            if any(docs[i] not in by_document for i in survivors):
+                # Not a per-document payload we can merge: score the whole set instead
+                return await self.client.invoke(tool, **kwargs)
+            semantic = {i: by_document[docs[i]] for i in survivors.tolist()}
+        return SimpleNamespace(content=format_results([
+            {"document": doc, "score": round(semantic[i], 4), "stage": "semantic", "bm25": round(float(lexical[i]), 4)}
+            if i in semantic else
+            {"document": doc, "score": None, "stage": "bm25", "bm25": round(float(lexical[i]), 4)}
+            for i, doc in enumerate(docs)
+        ]))
+
+
+class Cascade:
+    def __init__(self, top_k=None, min_score=None, min_docs=None):
+        self.top_k = CASCADE_TOP_K if top_k is None else top_k
+        self.min_score = CASCADE_MIN_SCORE if min_score is None else min_score
+        self.min_docs = CASCADE_MIN_DOCS if min_docs is None else min_docs
+        self.requests = 0
+        self.documents = 0
+        self.pruned = 0
+
+    @property
+    def enabled(self):
+        return bool(self.top_k) or self.min_score is not None
+
+    def wrap(self, client):
+        """
+        Puts the cascade in front of `client`; returns it unchanged when cascading is off.
+        """
+        return CascadeSession(self, client) if self.enabled else client
+
+    def _record(self, documents, survivors):
+        self.requests += 1
+        self.documents += documents
+        self.pruned += documents - survivors
+        telemetry.metrics.inc("rag_cascade_documents_total", survivors, stage="semantic")
+        telemetry.metrics.inc("rag_cascade_documents_total", documents - survivors, stage="bm25")
+
+    def stats(self):
+        return {
+            "top_k": self.top_k,
+            "min_score": self.min_score,
+            "requests": self.requests,
+            "documents": self.documents,
+            "pruned": self.pruned,
+        }
@@ -0,0 +1,73 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# docs://<id> for the whole set, docs://<id>#2,4 for a subset by 1-based document ID
+HANDLE = re.compile(r"^docs://([0-9a-f]{12})(?:#([\d,\s]+))?$")
+
+
+# Registry of document sets referenced by handle, so prompts never inline the corpus
+class DocumentHandles:
+    def __init__(self, max_sets=1024):
+        self.max_sets = max_sets
+        self.expansions = 0
+        self._sets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, docs):
+        docs = list(docs)
+        digest = hashlib.sha256("\0".join(docs).encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            self._sets[digest] = docs
+            self._sets.move_to_end(digest)
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+        return f"docs://{digest}"
+
+    def resolve(self, value):
+        """
+        Returns the documents a handle string refers to, or None if it is not a handle.
+        """
+        match = HANDLE.match(value.strip()) if isinstance(value, str) else None
+        if match is None:
+            return None
+        with self._lock:
+            docs = self._sets.get(match.group(1))
+        if docs is None:
+            raise ValueError(f"Unknown or expired document handle: {value}")
+        if match.group(2):
+            ids = [int(i) for i in match.group(2).split(",") if i.strip()]
+            docs = [docs[i - 1] for i in ids if 1 <= i <= len(docs)]
+        return docs
+
+    def expand(self, args):
+        """
+        Replaces handle strings (alone or inside a list) with the real document lists.
+        """
+        expanded = {}
+        for name, value in args.items():
+            docs = self.resolve(value)
+            if docs is None and isinstance(value, list) and value:
+                parts = [self.resolve(item) for item in value]
+                if all(part is not None for part in parts):
+                    docs = [doc for part in parts for doc in part]
+            if docs is not None:
+                self.expansions += 1
+                value = docs
+            expanded[name] = value
+        return expanded
+
+    def stats(self):
+        return {"sets": len(self._sets), "expansions": self.expansions}
+
+
+def describe_documents(handle, docs):
+    # What the LLM sees instead of the corpus: a handle, the IDs and the count
+    if not docs:
+        return "no documents were provided."
+    return (
+        f"{len(docs)} documents (IDs 1–{len(docs)}), referenced by the handle \"{handle}\".\n"
+        f"Pass \"{handle}\" as the 'documents' or 'docs' argument; "
+        f"use \"{handle}#2,3\" to pass only some documents by ID."
+    )
@@ -0,0 +1,200 @@
+import hashlib
+import importlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so a store directory must not be shared between processes
+    fcntl = None
+
+EMBEDDING_STORE_PATH = os.environ.get("EMBEDDING_STORE_PATH", ".cache/embeddings")
+# Optional "module:factory" returning an embedder (a callable over a list of texts with
+# `name` and `dim` attributes); defaults to the offline hashing embedder
+EMBEDDER = os.environ.get("EMBEDDER", "")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def text_key(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# Deterministic feature-hashing embedder: offline, dependency-free, good enough for tests
+class HashingEmbedder:
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                h = text_key(token)
+                matrix[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+def load_embedder():
+    if not EMBEDDER:
+        return HashingEmbedder()
+    module, _, attr = EMBEDDER.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+# Append-only float32 matrix on disk, memory-mapped and keyed by a 64-bit hash of the text.
+# Several processes (the apps, batch runs) can share one store: appends happen under an
+# exclusive lock on the directory, after picking up the rows other processes have added.
+class EmbeddingStore:
+    def __init__(self, path=None, embedder=None, initial_capacity=1024):
+        self.embedder = embedder or load_embedder()
+        self.dim = self.embedder.dim
+        # One directory per embedder so vectors from different models never mix
+        self.path = os.path.join(path or EMBEDDING_STORE_PATH, self.embedder.name)
+        os.makedirs(self.path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.count = self._stored_count()
+        self.capacity = max(initial_capacity, self.count)
+        self._open(self.capacity)
+        self._sorted = None
+
+    def _stored_count(self):
+        meta = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta):
+            return 0
+        with open(meta) as f:
+            return json.load(f)["count"]
+
+    @contextmanager
+    def _exclusive(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync(self):
+        # Rows appended by other processes since we last looked: map them and index their keys
+        count = self._stored_count()
+        if count <= self.count:
+            return
+        if count > self.capacity:
+            self._grow(count)
+        rows = np.arange(self.count, count)
+        order = np.argsort(self.keys[self.count:count], kind="stable")
+        if self._sorted is not None:
+            self._merge(np.asarray(self.keys[self.count:count])[order], rows[order])
+        self.count = count
+
+    def _open(self, capacity):
+        self.capacity = capacity
+        self.vectors = self._map("vectors.f32", np.float32, (capacity, self.dim))
+        self.keys = self._map("keys.u64", np.uint64, (capacity,))
+
+    def _map(self, name, dtype, shape):
+        filename = os.path.join(self.path, name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(filename, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(filename, dtype=dtype, mode="r+", shape=shape)
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.vectors.flush()
+        self.keys.flush()
+        self._open(capacity)
+
+    def _index(self):
+        # Sorted view of the stored keys for vectorized lookups, built once per process
+        if self._sorted is None:
+            order = np.argsort(self.keys[:self.count], kind="stable")
+            self._sorted = (np.asarray(self.keys[:self.count][order]), order)
+        return self._sorted
+
+    def _merge(self, new_keys, new_rows):
+        # np.unique returned the new keys sorted, so a linear insert keeps the index sorted
+        sorted_keys, order = self._index()
+        at = np.searchsorted(sorted_keys, new_keys)
+        self._sorted = (np.insert(sorted_keys, at, new_keys), np.insert(order, at, new_rows))
+
+    def lookup(self, keys):
+        """
+        Returns the stored row for each key, or -1 where the key is unknown.
+        """
+        sorted_keys, order = self._index()
+        if not len(sorted_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return np.where(sorted_keys[pos] == keys, order[pos], -1)
+
+    def embed(self, texts):
+        """
+        Returns a (len(texts), dim) float32 matrix, embedding only texts never seen before.
+        """
+        keys = np.fromiter((text_key(text) for text in texts), dtype=np.uint64, count=len(texts))
+        with self._lock:
+            rows = self.lookup(keys)
+            missing = np.flatnonzero(rows < 0)
+            if len(missing):
+                # Stored rows never change, so only a miss needs the cross-process lock
+                with self._exclusive():
+                    self._sync()
+                    rows = self.lookup(keys)
+                    missing = np.flatnonzero(rows < 0)
+                    if len(missing):
+                        self._append(keys[missing], [texts[i] for i in missing])
+                        rows = self.lookup(keys)
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            return np.asarray(self.vectors[rows])
+
+    def _append(self, keys, texts):
+        # Deduplicate within the batch before paying for the embedder
+        new_keys, first = np.unique(keys, return_index=True)
+        fresh = self.embedder([texts[i] for i in first])
+        start = self.count
+        if start + len(new_keys) > self.capacity:
+            self._grow(start + len(new_keys))
+        self.vectors[start:start + len(new_keys)] = fresh
+        self.keys[start:start + len(new_keys)] = new_keys
+        self._merge(new_keys, np.arange(start, start + len(new_keys)))
+        self.count += len(new_keys)
+        self._save()
+
+    def _save(self):
+        self.vectors.flush()
+        self.keys.flush()
+        meta = os.path.join(self.path, "meta.json")
+        with open(meta + ".tmp", "w") as f:
+            json.dump({"count": self.count, "dim": self.dim}, f)
+        os.replace(meta + ".tmp", meta)
+
+    def stats(self):
+        return {
+            "embedder": self.embedder.name,
+            "vectors": self.count,
+            "bytes": self.count * self.dim * 4,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def cosine_scores(query_vector, matrix):
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+    return (matrix @ query_vector) / np.where(norms == 0, 1, norms)
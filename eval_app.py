@@ -0,0 +1,222 @@
+import asyncio
+import os
+import time
+
+import telemetry
+from admission import AdmissionController
+from call_policy import CallPolicy
+from cascade import Cascade
+from doc_handles import DocumentHandles
+from eval_client import EvalClient
+from eval_tools import (
+    collect_results, evaluation_key, known_plan, pending_text, render_stages, scoring_plan, split_documents,
+    stream_tool_plan, tool_outcome_text,
+)
+from local_tools import LocalToolBackend
+from mcp_runtime import run_async, runtime, stream_async
+from plan_cache import PlanCache
+from replica_pool import ReplicaPool, server_urls
+from rescoring import IncrementalScorer
+from result_cache import ResultCache
+from router import InstructionRouter
+from single_flight import SingleFlight
+from speculation import Speculator
+from tool_catalog import ToolCatalog
+from warmup import Lazy, Readiness
+
+
+# The evaluation stack every Gradio app shares; each app brings its own prompt and LLM step.
+# Stock instructions are routed locally and repeated ones reuse a remembered plan, so the
+# LLM (`decide`, or the parallel tool bridge from use_bridge) only sees the rest.
+class EvalApp:
+    def __init__(self, name, server_url, model, adapt=None):
+        self.name = name
+        self.model = model
+        # Warm MCP sessions to every replica (MCP_SERVER_URLS, else server_url) shared by all handlers,
+        # with a cached tool catalog and result cache in front; BM25 and exact match run in-process
+        # Remote calls get per-tool deadlines, jittered retries and (HEDGE_REQUESTS=1) hedged duplicates
+        self.pool = ReplicaPool(server_urls(server_url))
+        self.handles = DocumentHandles()
+        # `adapt` wraps catalog tools for an agent framework (app.py's smolagents tools)
+        self.catalog = ToolCatalog(self.pool, adapt=adapt)
+        self.client = EvalClient(
+            self.pool, self.catalog, cache=ResultCache(), local=LocalToolBackend(), handles=self.handles,
+            policy=CallPolicy(), flights=SingleFlight("tool_call"),
+        )
+        self.router = InstructionRouter()
+        self.plans = PlanCache()
+        self.evaluations = SingleFlight("evaluation")
+        self.admission = AdmissionController()
+        # Per-session results per document: an edited line re-scores that line, not the whole set
+        self.rescoring = IncrementalScorer()
+        # CASCADE_TOP_K / CASCADE_MIN_SCORE: BM25 prunes large sets before semantic_relevance_scorer
+        self.cascade = Cascade()
+        # SPECULATE_TOOLS=semantic_relevance_scorer starts it while the LLM decides (tools answered locally are skipped)
+        self.speculator = Speculator(local=self.client.local)
+        self.readiness = Readiness()
+        # The LLM step for instructions without a known plan: an async generator of stages
+        self.decide = None
+        self.bridge = None
+        self.make_prompt = None
+        self.fix_args = None
+
+    def use_bridge(self, make_prompt, fix_args=None):
+        """
+        Decides with ParallelToolBridge: every tool call the model makes in a turn runs concurrently,
+        with one follow-up turn over the batched results. `fix_args(tool, args, docs)` corrects a
+        call's arguments before it runs.
+        """
+        def make_bridge():
+            # Built on first use (the OpenAI SDK is slow to import).
+            # No run_plan timeout: the client's CallPolicy owns per-tool deadlines and retries within them.
+            from tool_loop import ParallelToolBridge
+
+            return ParallelToolBridge(self.client, api_key=os.environ.get("OPENAI_API_KEY"), model=self.model, timeout=0)
+
+        self.bridge = Lazy(make_bridge)
+        self.make_prompt = make_prompt
+        self.fix_args = fix_args
+        self.decide = self._bridge_stages
+
+    # Async runner, streamed as stages (see eval_tools.render_stages)
+    async def stream_eval(self, query, documents, task_instruction, user="anonymous"):
+        scoped = self.cascade.wrap(self.rescoring.session(self.client, user))
+        with telemetry.request(self.name, model=self.model) as trace:
+            # 🧭 Stock instructions are routed locally; repeated instruction shapes reuse the LLM's earlier plan
+            with trace.span("llm_decision") as decision:
+                planned, source, fingerprint = await known_plan(
+                    self.client, self.router, self.plans, task_instruction, self.model,
+                )
+                decision["source"] = source
+            if planned:
+                yield "plan", f"🧭 Plan ({source}): {', '.join(planned)}"
+                # Every tool gets its slot up front; results fill them as they finish, in any order
+                for slot, tool in enumerate(planned):
+                    yield "pending", pending_text(tool), slot
+                with trace.span("tool_execution", tools=len(planned)):
+                    async for slot, outcome in stream_tool_plan(scoped, planned, query.strip(), split_documents(documents)):
+                        with trace.span("render", tool=outcome["tool"]):
+                            text = tool_outcome_text(outcome)
+                        yield "result", text, slot
+                yield "summary", f"⏱️ Done in {elapsed(trace):.2f}s ({len(planned)} tool(s), no LLM call)"
+                return
+
+            yield "plan", f"🧠 Asking {self.model} to choose tools…"
+            async for stage in self.decide(trace, scoped, query, documents, task_instruction, fingerprint):
+                yield stage
+
+    async def _bridge_stages(self, trace, scoped, query, documents, task_instruction, fingerprint):
+        # 🔮 Cheap scorers start now; the plan reuses them if it picks the same calls
+        speculation = self.speculator.start(scoped, query.strip(), split_documents(documents))
+        with trace.span("prompt_build"):
+            message = self.make_prompt(query, documents, task_instruction)
+        docs = split_documents(documents)
+
+        def fix_args(tool, args):
+            return self.fix_args(tool, args, docs) if self.fix_args is not None else args
+
+        # One LLM turn picks the tools, they all run concurrently and show up as each finishes,
+        # and one follow-up turn reads the results
+        try:
+            events = self.bridge.get().stream_query(message, trace, client=speculation or scoped, fix_args=fix_args)
+            async for event, value in events:
+                if event == "calls":
+                    for slot, call in enumerate(value):
+                        yield "pending", pending_text(call["name"]), slot
+                elif event == "outcome":
+                    slot, outcome = value
+                    with trace.span("render", tool=outcome["tool"]):
+                        text = tool_outcome_text(outcome)
+                    yield "result", text, slot
+                else:
+                    result = value
+        finally:
+            report = speculation.close() if speculation else ""
+        telemetry.record_usage(self.model, result.get("usage"))
+
+        if result["tool_calls"]:
+            self.plans.put(task_instruction, self.model, fingerprint, scoring_plan(result["tool_results"]))
+            if result["response"].content:
+                yield "result", f"🤖 LLM Summary:\n{result['response'].content}"
+        else:
+            yield "result", f"🤖 No tool was called.\n\nLLM Response:\n{result['response'].content}"
+        if report:
+            yield "summary", report
+        calls = len(result["tool_calls"])
+        yield "summary", f"⏱️ Done in {elapsed(trace):.2f}s ({calls} tool call(s), {2 if calls else 1} LLM turn(s))"
+
+    # Identical requests already in flight follow the same evaluation instead of repeating the LLM and tool calls
+    def shared_eval(self, query, documents, task_instruction, user="anonymous"):
+        return self.evaluations.stream(
+            evaluation_key(query, documents, task_instruction),
+            lambda: self.stream_eval(query, documents, task_instruction, user),
+        )
+
+    async def run_eval(self, query, documents, task_instruction, user="anonymous"):
+        return await collect_results(self.shared_eval(query, documents, task_instruction, user))
+
+    async def evaluate(self, query, documents, task_instruction, user="anonymous"):
+        """
+        Streaming Gradio output: each stage shows up as soon as it completes. Admission bounds how
+        many evaluations run at once and answers "busy" straight away when the queue is full.
+        """
+        stages = self.admission.stream(user, lambda: self.shared_eval(query, documents, task_instruction, user))
+        async for output in render_stages(stream_async(stages)):
+            yield output
+
+    async def list_tools(self):
+        tools = await run_async(self.client.list_tools())
+        if not tools:
+            return "⚠️ No tools available or MCP server not reachable."
+        stats = self.pool.stats()
+        cached = self.client.cache.stats()
+        routed = self.router.stats()
+        memo = self.plans.stats()
+        policy = self.client.policy.stats()
+        joined = self.evaluations.stats()["coalesced"]
+        joined_calls = self.client.flights.stats()["coalesced"]
+        admitted = self.admission.stats()
+        rescored = self.rescoring.stats()
+        cascaded = self.cascade.stats()
+        speculated = self.speculator.stats()
+        lines = [
+            self.readiness.summary(),
+            "",
+            "🧰 Available Tools:\n" + "\n".join(f"- {tool.name}" for tool in tools),
+            "",
+            f"🔌 MCP pool: {stats['open']}/{stats['size']} sessions, {stats['handshakes']} handshakes, "
+            f"{stats['reuses']} reuses, {stats['reconnects']} reconnects",
+            f"🩺 Replicas: {stats['healthy']}/{len(stats['replicas'])} healthy, {stats['failovers']} failovers",
+            f"🛡️ Calls: {policy['retries']} retries, {policy['hedges']} hedges ({policy['hedge_wins']} won), "
+            f"{policy['timeouts']} timeouts",
+            f"🤝 Single-flight: {joined} evaluations and {joined_calls} tool calls joined one already in flight",
+            f"🚦 Admission: {admitted['active']}/{self.admission.max_active} running, {admitted['queued']} queued, "
+            f"{admitted['rejected']} turned away",
+            f"💾 Result cache: {cached['entries']} entries, {cached['network_calls_avoided']} network calls avoided",
+            f"🧭 Router: {routed['hit_rate']:.0%} hit rate, {routed['llm_calls_saved']} LLM calls saved",
+            f"🧠 Plan cache: {memo['entries']} plans, {memo['llm_calls_skipped']} LLM calls skipped",
+            f"✏️ Incremental re-scoring: {rescored['reused']} document results reused, {rescored['sent']} re-scored",
+            f"🪜 Cascade: {cascaded['pruned']}/{cascaded['documents']} documents pruned by BM25 before semantic scoring",
+        ]
+        if self.speculator.enabled:
+            lines.append(
+                f"🔮 Speculation: {speculated['used']} used ({speculated['saved_seconds']:.2f}s saved), "
+                f"{speculated['wasted']} discarded ({speculated['wasted_seconds']:.2f}s wasted)"
+            )
+        return "\n".join(lines)
+
+    def start(self, **steps):
+        """
+        Serves /metrics and warms the stack in the background: the UI binds right away, and
+        sessions, tool discovery and the LLM client (plus any extra `steps`) warm up behind it.
+        """
+        telemetry.start_metrics_server()
+        warm = {"mcp_sessions": self.pool.warm, "tool_catalog": self.client.list_tools}
+        if self.bridge is not None:
+            warm["llm_client"] = lambda: asyncio.to_thread(self.bridge.get)
+        runtime.submit(self.readiness.run({**warm, **steps}))
+
+
+def elapsed(trace):
+    # Seconds since the request's trace opened
+    return time.perf_counter() - trace.started
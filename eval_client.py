@@ -0,0 +1,81 @@
+import telemetry
+from result_cache import cached_invoke, result_key
+from tool_catalog import ToolCatalog
+
+
+# MCPClient-compatible facade: discovery from the catalog, calls through the session pool
+class EvalClient:
+    def __init__(self, pool, catalog=None, cache=None, local=None, handles=None, policy=None, flights=None):
+        self.pool = pool
+        self.catalog = catalog or ToolCatalog(pool)
+        self.cache = cache
+        self.local = local
+        self.handles = handles
+        self.policy = policy
+        self.flights = flights
+
+    @property
+    def url(self):
+        return self.pool.url
+
+    async def list_tools(self):
+        with telemetry.span("tool_discovery"):
+            return await self.catalog.tools()
+
+    async def invoke(self, tool, **kwargs):
+        # The LLM passes document handles; tools always receive the real lists
+        if self.handles is not None:
+            kwargs = self.handles.expand(kwargs)
+        with telemetry.span("tool_call", tool=tool) as span:
+            if self.flights is None:
+                return await self._invoke(tool, kwargs, span)
+            # An identical call already in flight is awaited instead of being sent again
+            key = result_key(tool, kwargs, url=self.url)
+            if self.flights.in_flight(key):
+                span["source"] = "coalesced"
+            return await self.flights.do(key, lambda: self._invoke(tool, kwargs, span))
+
+    async def _invoke(self, tool, kwargs, span):
+        # Deterministic tools run in-process: no round-trip and nothing worth caching
+        if self.local is not None and self.local.handles(tool, kwargs):
+            span["source"] = "local"
+            return await self.local.invoke(tool, **kwargs)
+        if self.cache is None:
+            return await self._remote(tool, kwargs, span)
+        # Results are only reused while the tool schemas are unchanged
+        await self.catalog.tools()
+        result = await cached_invoke(
+            self.cache, tool, kwargs, self.catalog.fingerprint,
+            lambda: self._remote(tool, kwargs, span), url=self.url,
+        )
+        span.setdefault("source", "cache")
+        return result
+
+    async def _remote(self, tool, kwargs, span):
+        span["source"] = "remote"
+        if self.policy is None:
+            result = await self.pool.invoke(tool, **kwargs)
+        else:
+            # Deadline, retries and hedging; every attempt goes back through the pool
+            result = await self.policy.call(tool, lambda: self.pool.invoke(tool, **kwargs))
+        telemetry.record_bytes(
+            tool, telemetry.payload_bytes(kwargs), telemetry.payload_bytes(getattr(result, "content", result)), span,
+        )
+        return result
+
+    def stats(self):
+        stats = {
+            "pool": self.pool.stats(),
+            "catalog": self.catalog.stats(),
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if self.local is not None:
+            stats["local"] = self.local.stats()
+        if self.handles is not None:
+            stats["handles"] = self.handles.stats()
+        if self.policy is not None:
+            stats["policy"] = self.policy.stats()
+        if self.flights is not None:
+            stats["flights"] = self.flights.stats()
+        return stats
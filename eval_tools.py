@@ -0,0 +1,123 @@
+import hashlib
+import json
+
+from fanout import stream_plan
+from result_decoder import decode
+
+# Scoring tools exposed by the RAG evaluation MCP server
+SCORING_TOOLS = (
+    "bm25_relevance_scorer",
+    "semantic_relevance_scorer",
+    "redundancy_checker",
+    "exact_match_checker",
+)
+
+
+def split_documents(documents):
+    """
+    Accepts the Gradio one-per-line string or a list and returns the non-empty documents.
+    """
+    if isinstance(documents, str):
+        documents = documents.split("\n")
+    return [doc.strip() for doc in documents if doc and doc.strip()]
+
+
+def evaluation_key(query, documents, instruction, *extra):
+    # Same request modulo surrounding whitespace and blank document lines → same key
+    parts = [query.strip(), split_documents(documents), instruction.strip(), *extra]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def tool_arguments(tool, query, docs):
+    # redundancy_checker takes 'docs'; the scorers take 'query' + 'documents'
+    if tool == "redundancy_checker":
+        return {"docs": docs}
+    return {"query": query, "documents": docs}
+
+
+def format_tool_result(tool, content):
+    # Known payloads render from their typed records; anything else is shown as returned
+    return f"✅ Tool Used: {tool}\n\n📊 Result:\n{decode(content, tool).render()}"
+
+
+def tool_outcome_text(outcome):
+    # One {"tool", "result"} / {"tool", "error"} entry from a multi-tool turn
+    if "error" in outcome:
+        return f"❌ Tool {outcome['tool']} failed: {outcome['error']}"
+    return format_tool_result(outcome["tool"], outcome["result"].content)
+
+
+def scoring_plan(outcomes):
+    """
+    The distinct scoring tools of a multi-tool turn, in call order; worth remembering as a
+    plan only when every call succeeded and every tool the model called is a known scorer.
+    """
+    if all("result" in outcome and outcome["tool"] in SCORING_TOOLS for outcome in outcomes):
+        return list(dict.fromkeys(outcome["tool"] for outcome in outcomes))
+    return []
+
+
+def pending_text(tool):
+    # Placeholder for a tool's slot until its outcome arrives
+    return f"⏳ Running {tool}…"
+
+
+async def stream_tool_plan(client, tools, query, docs):
+    """
+    Invokes the planned tools concurrently and yields (slot, outcome) pairs as each one finishes,
+    where slot is the tool's index in the plan and the outcome a {"tool", "result"} / {"tool", "error"} entry.
+    A failed tool becomes an error entry, like run_plan, and the others keep running.
+    """
+    calls = [{"tool": tool, "args": tool_arguments(tool, query, docs)} for tool in tools]
+    # No fan-out timeout: the client's CallPolicy owns per-tool deadlines
+    async for slot, outcome in stream_plan(
+        calls, lambda tool, args: client.invoke(tool, **args), concurrency=len(calls), timeout=0,
+    ):
+        yield slot, outcome
+
+
+async def known_plan(client, router, plans, instruction, model):
+    """
+    Resolves a tool plan without the LLM: local routing first, then the memoized plans.
+    Returns (tools or None, source, catalog fingerprint).
+    """
+    plan = router.route(instruction)
+    if plan:
+        return plan.tools, "routed locally", None
+    await client.list_tools()
+    fingerprint = client.catalog.fingerprint
+    return plans.get(instruction, model, fingerprint), "remembered plan", fingerprint
+
+
+# Stages are ("plan" | "pending" | "result" | "summary" | "busy", text), or (stage, text, slot) for
+# output with a fixed place: a tool's "pending" placeholder is replaced by its "result" when it lands.
+
+async def collect_results(stages):
+    """
+    Drains a stage stream into the classic single-string output: the results, slots in slot order.
+    """
+    order = []
+    results = {}
+    async for stage, text, *slot in stages:
+        key = slot[0] if slot else object()
+        if key not in results:
+            order.append(key)
+            results[key] = None
+        if stage == "result":
+            results[key] = text
+    return "\n\n".join(results[key] for key in order if results[key] is not None)
+
+
+async def render_stages(stages):
+    # Gradio streaming: each yield replaces the Textbox with everything received so far,
+    # each slot staying where its placeholder first appeared
+    output = []
+    slots = {}
+    async for stage, text, *slot in stages:
+        if slot and slot[0] in slots:
+            output[slots[slot[0]]] = text
+        else:
+            if slot:
+                slots[slot[0]] = len(output)
+            output.append(text)
+        yield "\n\n".join(output)
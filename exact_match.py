@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+
+# Optional normalisation applied to queries and documents alike: any of "case,whitespace,punctuation".
+# Empty (the default) keeps exact_match_checker's verbatim substring semantics.
+EXACT_MATCH_NORMALIZE = [name for name in os.environ.get("EXACT_MATCH_NORMALIZE", "").split(",") if name]
+# Distinct documents whose match sets are kept between calls
+EXACT_MATCH_DOCUMENTS = int(os.environ.get("EXACT_MATCH_DOCUMENTS", "100000"))
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text, case=False, whitespace=False, punctuation=False):
+    if case:
+        text = text.casefold()
+    if punctuation:
+        text = _PUNCTUATION.sub("", text)
+    if whitespace:
+        text = _WHITESPACE.sub(" ", text).strip()
+    return text
+
+
+# Multi-pattern substring search: one pass over a text finds every pattern it contains
+class AhoCorasick:
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = self.goto[state][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (index,)
+
+        # Breadth-first failure links; each state also reports the patterns of its suffix states
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """
+        Returns the set of pattern indices occurring in `text`.
+        """
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+# exact_match_checker over a batch of queries: the automaton holds every query, each distinct
+# document is normalised and scanned once, and any query's per-document answer is a set lookup
+class ExactMatchIndex:
+    def __init__(self, queries, normalization=None, max_documents=None):
+        flags = EXACT_MATCH_NORMALIZE if normalization is None else normalization
+        self.options = {name: name in flags for name in ("case", "whitespace", "punctuation")}
+        self.max_documents = max_documents or EXACT_MATCH_DOCUMENTS
+        self.patterns = {}
+        for query in queries:
+            self.patterns.setdefault(self._key(query), len(self.patterns))
+        self.automaton = AhoCorasick(self.patterns)
+        self.scans = 0
+        self.lookups = 0
+        self._documents = OrderedDict()
+        self._corpora = OrderedDict()
+        # The local backend answers from worker threads; the LRU dicts aren't safe to share
+        self._lock = threading.Lock()
+
+    def _key(self, query):
+        return normalize(query.strip(), **self.options)
+
+    def covers(self, query):
+        return self._key(query) in self.patterns
+
+    def matches(self, document):
+        """
+        Indices of the queries contained in `document`, computed once per distinct text.
+        """
+        found = self._documents.get(document)
+        if found is None:
+            self.scans += 1
+            found = frozenset(self.automaton.scan(normalize(document, **self.options)))
+            self._documents[document] = found
+            if len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        else:
+            self.lookups += 1
+            self._documents.move_to_end(document)
+        return found
+
+    def _found(self, documents):
+        # Batch rows mostly share a corpus; keep the match sets of the recent ones, like _bm25_index
+        corpus = tuple(documents)
+        with self._lock:
+            found = self._corpora.get(corpus)
+            if found is None:
+                found = self._corpora[corpus] = [self.matches(doc) for doc in corpus]
+                if len(self._corpora) > 32:
+                    self._corpora.popitem(last=False)
+            else:
+                self.lookups += len(corpus)
+                self._corpora.move_to_end(corpus)
+        return found
+
+    def match(self, query, documents):
+        """
+        Per-document booleans for one indexed query, as exact_match_checker returns them.
+        """
+        key = self._key(query)
+        if not key:
+            # Like str.find, the empty string occurs in every document
+            return [True] * len(documents)
+        index = self.patterns[key]
+        return [index in found for found in self._found(documents)]
+
+    def match_all(self, documents):
+        """
+        {normalised query: per-document booleans} for every indexed query, scanning each document once.
+        """
+        found = self._found(documents)
+        return {
+            key: [True] * len(documents) if not key else [index in doc for doc in found]
+            for key, index in self.patterns.items()
+        }
+
+    def stats(self):
+        return {
+            "queries": len(self.patterns),
+            "states": len(self.automaton.goto),
+            "documents": len(self._documents),
+            "scans": self.scans,
+            "lookups": self.lookups,
+            "normalization": [name for name, on in self.options.items() if on],
+        }
@@ -0,0 +1,138 @@
+"""
+Scripted, OpenAI-compatible chat completions endpoint for offline benchmarks.
+
+Point the OpenAI SDK at it with OPENAI_BASE_URL=http://127.0.0.1:8766/v1. It
+answers tool-calling requests by routing the prompt's instruction with the local
+InstructionRouter, answers llm_decider's "JSON list" prompt with a fixed plan,
+and sleeps `--latency` seconds per call to stand in for model time.
+
+    python fake_llm.py --port 8766 --latency 0.8
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from router import InstructionRouter
+
+_INSTRUCTION = re.compile(r"Instruction\**:?\**\s*(.+)")
+_QUERY = re.compile(r"(?:query = |\*\*Query\*\*: |Query: )\"?([^\"\n]*)")
+_HANDLE = re.compile(r"docs://[0-9a-f]{12}")
+
+_router = InstructionRouter()
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _prompt_text(messages):
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(str(part.get("text", part)) if isinstance(part, dict) else str(part) for part in content)
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def _tool_calls(prompt, tools):
+    instruction = _INSTRUCTION.search(prompt)
+    query = _QUERY.search(prompt)
+    handle = _HANDLE.search(prompt)
+    offered = [tool["function"]["name"] for tool in tools]
+    plan = _router.plan(instruction.group(1) if instruction else prompt).tools
+    chosen = [tool for tool in plan if tool in offered] or offered[:1]
+    calls = []
+    for tool in chosen:
+        documents = handle.group(0) if handle else []
+        args = {"docs": documents} if tool == "redundancy_checker" else {
+            "query": query.group(1).strip() if query else "", "documents": documents,
+        }
+        calls.append({
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": tool, "arguments": json.dumps(args)},
+        })
+    return calls
+
+
+def complete(body):
+    """
+    Builds a chat.completion response for the request body.
+    """
+    messages = body.get("messages", [])
+    prompt = _prompt_text(messages)
+    message = {"role": "assistant", "content": None}
+    finish = "stop"
+
+    if messages and messages[-1].get("role") == "tool":
+        message["content"] = "Evaluation complete: see the tool results above."
+    elif "Respond with a JSON list" in prompt:
+        query = _QUERY.search(prompt)
+        args = {"query": query.group(1).strip() if query else "", "documents": "..."}
+        message["content"] = json.dumps([
+            {"tool": "BM25 Relevance Scorer", "args": args},
+            {"tool": "Semantic Relevance Scorer", "args": args},
+        ])
+    elif body.get("tools"):
+        message["tool_calls"] = _tool_calls(prompt, body["tools"])
+        finish = "tool_calls"
+    else:
+        message["content"] = "OK"
+
+    completion = message["content"] or json.dumps(message.get("tool_calls"))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+        "usage": {
+            "prompt_tokens": _tokens(prompt),
+            "completion_tokens": _tokens(completion),
+            "total_tokens": _tokens(prompt) + _tokens(completion),
+        },
+    }
+
+
+def make_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(latency)
+            payload = json.dumps(complete(body)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8766, latency=0.0, host="127.0.0.1", background=False):
+    server = ThreadingHTTPServer((host, port), make_handler(latency))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scripted OpenAI-compatible fake model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per completion")
+    args = parser.parse_args(argv)
+    serve(args.port, args.latency, args.host)
+
+
+if __name__ == "__main__":
+    main()
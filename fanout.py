@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+# Max tool calls from one plan in flight at once
+FANOUT_CONCURRENCY = int(os.environ.get("FANOUT_CONCURRENCY", "4"))
+# Seconds before a single tool call is abandoned
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "30"))
+
+
+def _runner(invoke, concurrency, timeout):
+    limit = asyncio.Semaphore(concurrency or FANOUT_CONCURRENCY)
+    timeout = TOOL_TIMEOUT if timeout is None else timeout
+
+    async def run_one(call):
+        tool = call["tool"]
+        async with limit:
+            try:
+                result = await asyncio.wait_for(invoke(tool, call.get("args", {})), timeout or None)
+                return {"tool": tool, "result": result}
+            except asyncio.TimeoutError as e:
+                return {"tool": tool, "error": f"Timed out after {timeout:g}s" if timeout else str(e)}
+            except Exception as e:
+                return {"tool": tool, "error": str(e)}
+
+    return run_one
+
+
+async def run_plan(calls, invoke, concurrency=None, timeout=None):
+    """
+    Runs a plan of {"tool": ..., "args": {...}} calls concurrently.
+
+    `invoke(tool, args)` must return an awaitable. Results keep the plan's order;
+    a failed or timed-out call yields {"tool", "error"} instead of failing the plan.
+    timeout=0 leaves deadlines to `invoke`, e.g. when a CallPolicy retries within its own.
+    """
+    run_one = _runner(invoke, concurrency, timeout)
+    return await asyncio.gather(*[run_one(call) for call in calls])
+
+
+async def stream_plan(calls, invoke, concurrency=None, timeout=None):
+    """
+    Like run_plan, but yields (index in the plan, outcome) pairs as each call finishes.
+    Calls still running when the consumer stops are cancelled.
+    """
+    run_one = _runner(invoke, concurrency, timeout)
+
+    async def indexed(i, call):
+        return i, await run_one(call)
+
+    tasks = [asyncio.ensure_future(indexed(i, call)) for i, call in enumerate(calls)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import threading
+from functools import lru_cache
+from types import SimpleNamespace
+
+import numpy as np
+
+from embedding_store import EmbeddingStore, cosine_scores
+from minhash import MinHashLSH
+
+# Tools resolved in-process instead of over SSE; empty disables the local backend.
+# semantic_relevance_scorer is opt-in (add it to LOCAL_TOOLS): it scores with the client-side
+# embedder, which only matches the server when EMBEDDER points at the same model
+LOCAL_TOOLS = [
+    name for name in os.environ.get(
+        "LOCAL_TOOLS", "bm25_relevance_scorer,exact_match_checker,redundancy_checker"
+    ).split(",") if name
+]
+# Opt-in: sets of at least this many documents get redundancy_checker's MinHash/LSH
+# approximation in-process. 0 (the default) keeps every set on the server's exact pairwise checker.
+REDUNDANCY_LOCAL_MIN_DOCS = int(os.environ.get("REDUNDANCY_LOCAL_MIN_DOCS", "0"))
+
+
+def tokenize(text):
+    return text.lower().split()
+
+
+def _as_list(documents):
+    if isinstance(documents, str):
+        documents = documents.split("\n")
+    return [doc.strip() for doc in documents if doc and doc.strip()]
+
+
+def format_results(results):
+    # Same repr the server's RootModel result renders to, so test5's `root=` parsing keeps working
+    return "root=" + repr({"results": results})
+
+
+# BM25Okapi (k1=1.5, b=0.75, epsilon=0.25) over a sparse document-term matrix
+class BM25Index:
+    def __init__(self, documents, k1=1.5, b=0.75, epsilon=0.25):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        doc_ids, term_ids = [], []
+        lengths = np.zeros(len(self.documents), dtype=np.float64)
+        for i, doc in enumerate(self.documents):
+            tokens = tokenize(doc)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                doc_ids.append(i)
+                term_ids.append(self.vocab.setdefault(token, len(self.vocab)))
+
+        # CSR layout: per-term postings of (doc, tf), built from the COO token stream
+        n_docs, n_terms = len(self.documents), len(self.vocab)
+        pairs = np.asarray(term_ids, dtype=np.int64) * max(n_docs, 1) + np.asarray(doc_ids, dtype=np.int64)
+        keys, tf = np.unique(pairs, return_counts=True)
+        terms = keys // max(n_docs, 1)
+        self.indptr = np.searchsorted(terms, np.arange(n_terms + 1))
+        self.postings = (keys % max(n_docs, 1)).astype(np.int64)
+        self.tf = tf.astype(np.float64)
+
+        df = np.diff(self.indptr).astype(np.float64)
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        average_idf = idf.mean() if n_terms else 0.0
+        self.idf = np.where(idf < 0, epsilon * average_idf, idf)
+        avgdl = lengths.mean() if n_docs else 0.0
+        self.norm = k1 * (1 - b + b * lengths / avgdl) if avgdl else np.full(n_docs, k1)
+
+    def scores(self, query):
+        scores = np.zeros(len(self.documents), dtype=np.float64)
+        for token in tokenize(query):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.indptr[term], self.indptr[term + 1]
+            docs = self.postings[start:end]
+            tf = self.tf[start:end]
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + self.norm[docs])
+        return scores
+
+
+@lru_cache(maxsize=32)
+def _bm25_index(documents):
+    # Batch runs score many queries against the same corpus; keep recent indexes
+    return BM25Index(documents)
+
+
+def bm25_scores(query, documents):
+    """
+    Raw BM25 scores of `documents` (a list) for `query`, as a numpy array.
+    """
+    return _bm25_index(tuple(documents)).scores(query) if documents else np.zeros(0)
+
+
+def bm25_relevance_scorer(query, documents=None, docs=None):
+    documents = _as_list(documents if documents is not None else docs or [])
+    scores = bm25_scores(query, documents)
+    return format_results([
+        {"document": doc, "score": round(float(score), 4)}
+        for doc, score in zip(documents, scores)
+    ])
+
+
+_exact_index = None
+
+
+def use_exact_match_index(index):
+    """
+    Answers exact_match_checker from an ExactMatchIndex for the queries it covers (None to stop).
+    """
+    global _exact_index
+    _exact_index = index
+
+
+def exact_match_checker(query, documents=None, docs=None):
+    documents = _as_list(documents if documents is not None else docs or [])
+    if _exact_index is not None and _exact_index.covers(query):
+        # Batch mode: every document is scanned once for all the batch's queries
+        matches = _exact_index.match(query, documents)
+    else:
+        needle = query.strip()
+        matches = np.char.find(np.asarray(documents, dtype=str), needle) >= 0 if documents else []
+    return format_results([
+        {"document": doc, "exact_match": bool(match)}
+        for doc, match in zip(documents, matches)
+    ])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def embedding_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+    return _store
+
+
+def semantic_relevance_scorer(query, documents=None, docs=None):
+    documents = _as_list(documents if documents is not None else docs or [])
+    if not documents:
+        return format_results([])
+    # Query and documents share one lookup; only unseen texts reach the embedder
+    vectors = embedding_store().embed([query.strip()] + documents)
+    scores = cosine_scores(vectors[0], vectors[1:])
+    return format_results([
+        {"document": doc, "score": round(float(score), 4)}
+        for doc, score in zip(documents, scores)
+    ])
+
+
+def redundancy_checker(docs=None, documents=None, threshold=None):
+    docs = _as_list(docs if docs is not None else documents or [])
+    pairs, clusters = MinHashLSH(threshold).near_duplicates(docs)
+    results = [
+        {"document_1": docs[i], "document_2": docs[j], "similarity": round(similarity, 4)}
+        for i, j, similarity in pairs
+    ]
+    # Labelled: LSH can miss pairs near the threshold and Jaccard isn't the server's similarity
+    return "root=" + repr({"results": results, "clusters": clusters, "approximate": True})
+
+
+TOOL_FUNCTIONS = {
+    "bm25_relevance_scorer": bm25_relevance_scorer,
+    "exact_match_checker": exact_match_checker,
+    "redundancy_checker": redundancy_checker,
+    "semantic_relevance_scorer": semantic_relevance_scorer,
+}
+
+
+# In-process backend exposing the deterministic tools with the MCP tools' names and arguments
+class LocalToolBackend:
+    def __init__(self, tools=None):
+        names = LOCAL_TOOLS if tools is None else tools
+        self.tools = {name: TOOL_FUNCTIONS[name] for name in names if name in TOOL_FUNCTIONS}
+        self.calls = 0
+
+    def handles(self, tool, args):
+        if tool not in self.tools:
+            return False
+        if tool == "redundancy_checker":
+            # Approximate, so only when enabled, and only on sets large enough to pay off
+            docs = args.get("docs", args.get("documents")) or []
+            return bool(REDUNDANCY_LOCAL_MIN_DOCS) and len(_as_list(docs)) >= REDUNDANCY_LOCAL_MIN_DOCS
+        return True
+
+    async def invoke(self, tool, **kwargs):
+        self.calls += 1
+        # Embedding, MinHash and BM25 are CPU work: run them off the shared event loop
+        return SimpleNamespace(content=await asyncio.to_thread(self.tools[tool], **kwargs))
+
+    def stats(self):
+        return {"tools": sorted(self.tools), "calls": self.calls}
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+
+# Number of warm MCP sessions kept per server URL
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "4"))
+
+
+# Background event loop shared by every Gradio handler in the process
+class BackgroundLoop:
+    def __init__(self, name="mcp-runtime"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro):
+        """
+        Schedules a coroutine on the background loop and returns a concurrent Future.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """
+        Runs a coroutine on the background loop and blocks until it finishes.
+        """
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join()
+                self._loop.close()
+            self._loop = None
+            self._thread = None
+
+
+runtime = BackgroundLoop()
+
+
+def run_sync(coro, timeout=None):
+    return runtime.run(coro, timeout)
+
+
+async def run_async(coro):
+    # Lets async Gradio handlers await work that lives on the background loop
+    return await asyncio.wrap_future(runtime.submit(coro))
+
+
+async def stream_async(agen):
+    """
+    Iterates an async generator on the background loop from the caller's loop.
+    """
+    try:
+        while True:
+            try:
+                item = await run_async(agen.__anext__())
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        await run_async(agen.aclose())
+
+
+# Exceptions that mean the session or its transport is broken, as opposed to a tool or argument
+# error from a healthy server (httpx / anyio / mcp class names, so none of them must be installed)
+_TRANSPORT_ERRORS = {"TransportError", "ClosedResourceError", "BrokenResourceError", "EndOfStream"}
+
+
+def is_connection_error(exc):
+    if isinstance(exc, BaseExceptionGroup):
+        return any(is_connection_error(inner) for inner in exc.exceptions)
+    if isinstance(exc, (OSError, EOFError, asyncio.TimeoutError)):
+        return True
+    return any(cls.__name__ in _TRANSPORT_ERRORS for cls in type(exc).__mro__)
+
+
+# Seconds allowed for the SSE connect plus the MCP initialize handshake
+MCP_CONNECT_TIMEOUT = float(os.environ.get("MCP_CONNECT_TIMEOUT", "30"))
+
+
+# One initialized MCP ClientSession over SSE, kept open between calls. The transport's
+# context lives in a task of its own (anyio scopes must be exited by the task that entered
+# them); calls from any task on the loop go through the open session.
+class MCPSession:
+    def __init__(self, url):
+        self.url = url
+        self.session = None
+        self._task = None
+        self._closing = None
+
+    @property
+    def connected(self):
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def connect(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        self._closing = asyncio.Event()
+        self._task = loop.create_task(self._run(ready))
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout or MCP_CONNECT_TIMEOUT)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _run(self, ready):
+        # Imported lazily: the mcp SDK is only needed once a session is opened
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
+        try:
+            async with sse_client(self.url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    ready.set_result(None)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            self.session = None
+            if not ready.done():
+                ready.cancel()
+
+    def _open_session(self):
+        if not self.connected:
+            raise ConnectionError(f"MCP session to {self.url} is closed")
+        return self.session
+
+    async def list_tools(self):
+        return (await self._open_session().list_tools()).tools
+
+    async def invoke(self, tool, **kwargs):
+        return await self._open_session().call_tool(tool, kwargs)
+
+    async def close(self):
+        if self._closing is not None:
+            self._closing.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except BaseException:
+                self._task.cancel()
+        self.session = None
+
+
+# Pool of warm, reusable MCP sessions bound to the background loop
+class MCPSessionPool:
+    def __init__(self, url, size=None, factory=None):
+        self.url = url
+        self.size = size or MCP_POOL_SIZE
+        self.factory = factory or MCPSession
+        self._idle = None
+        self._created = 0
+        self._in_use = 0
+        self.reuses = 0
+        self.reconnects = 0
+        self.handshakes = 0
+
+    def _queue(self):
+        # The queue must be created on the loop that uses it
+        if self._idle is None:
+            self._idle = asyncio.LifoQueue()
+        return self._idle
+
+    def _new_session(self):
+        self._created += 1
+        return self.factory(self.url)
+
+    async def _connect(self, session):
+        # Sessions are created unopened; the SSE connection and handshake happen here, once
+        if getattr(session, "connected", True):
+            return
+        try:
+            await session.connect()
+        except BaseException:
+            self._created -= 1
+            raise
+        self.handshakes += 1
+
+    async def _acquire(self):
+        idle = self._queue()
+        if idle.empty() and self._created < self.size:
+            session = self._new_session()
+        else:
+            session = await idle.get()
+            if getattr(session, "connected", True):
+                self.reuses += 1
+        await self._connect(session)
+        return session
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Checks out a session for the duration of the block.
+        Sessions that fail with a connection error are dropped and replaced with a fresh one;
+        tool errors leave the session in the pool.
+        """
+        session = await self._acquire()
+        self._in_use += 1
+        healthy = True
+        try:
+            yield session
+        except Exception as e:
+            healthy = not is_connection_error(e)
+            raise
+        finally:
+            self._in_use -= 1
+            if healthy:
+                self._queue().put_nowait(session)
+            else:
+                await self._discard(session)
+
+    async def _discard(self, session):
+        close = getattr(session, "disconnect", None) or getattr(session, "close", None)
+        if close is not None:
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                pass
+        # Replace the broken session so waiters are never starved
+        self._created -= 1
+        self.reconnects += 1
+        self._queue().put_nowait(self._new_session())
+
+    async def warm(self):
+        """
+        Opens and initializes sessions up to the configured pool size.
+        """
+        sessions = []
+        while self._created < self.size:
+            sessions.append(self._new_session())
+        outcomes = await asyncio.gather(*[self._connect(session) for session in sessions], return_exceptions=True)
+        for session in sessions:
+            if getattr(session, "connected", True):
+                self._queue().put_nowait(session)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if errors:
+            raise errors[0]
+
+    # MCPClient-compatible surface so the pool can be handed to OpenAIBridge / MCPAdaptTool
+    async def list_tools(self):
+        async with self.session() as session:
+            return await session.list_tools()
+
+    async def invoke(self, tool, **kwargs):
+        async with self.session() as session:
+            return await session.invoke(tool, **kwargs)
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "size": self.size,
+            "open": self._created,
+            "handshakes": self.handshakes,
+            "in_use": self._in_use,
+            "reuses": self.reuses,
+            "reconnects": self.reconnects,
+        }
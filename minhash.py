@@ -0,0 +1,101 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Jaccard similarity above which two documents count as near-duplicates
+MINHASH_THRESHOLD = float(os.environ.get("MINHASH_THRESHOLD", "0.5"))
+MINHASH_PERMUTATIONS = int(os.environ.get("MINHASH_PERMUTATIONS", "128"))
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text, k=3):
+    """
+    Word k-shingles, hashed to 32 bits; short documents fall back to single words.
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) >= k:
+        grams = (" ".join(words[i:i + k]) for i in range(len(words) - k + 1))
+    else:
+        grams = words or [text.lower()]
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+def lsh_bands(threshold, num_perm):
+    """
+    Picks (bands, rows) so the LSH S-curve, (1/b)^(1/r), sits closest to the threshold.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class _Clusters:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        self.parent[self.find(i)] = self.find(j)
+
+
+# Near-duplicate detection in ~linear time: MinHash signatures + LSH banding, exact Jaccard on candidates
+class MinHashLSH:
+    def __init__(self, threshold=None, num_perm=None, seed=1):
+        self.threshold = MINHASH_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm or MINHASH_PERMUTATIONS
+        self.bands, self.rows = lsh_bands(self.threshold, self.num_perm)
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_PRIME), self.num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), self.num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        # Universal hashing as in datasketch: uint64 wrap-around is part of the mixing
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        return (((np.outer(values, self.a) + self.b) % _PRIME) & _MAX_HASH).min(axis=0)
+
+    def candidates(self, signatures):
+        pairs = set()
+        for band in range(self.bands):
+            start = band * self.rows
+            buckets = {}
+            for i, signature in enumerate(signatures):
+                buckets.setdefault(signature[start:start + self.rows].tobytes(), []).append(i)
+            for members in buckets.values():
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]))
+        return sorted(pairs)
+
+    def near_duplicates(self, docs):
+        """
+        Returns (pairs, clusters): [(i, j, jaccard)] above the threshold and the
+        connected groups of document indices they form (singletons omitted).
+        """
+        sets = [shingles(doc) for doc in docs]
+        signatures = [self.signature(s) for s in sets]
+        pairs = []
+        clusters = _Clusters(len(docs))
+        for i, j in self.candidates(signatures):
+            similarity = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+            if similarity >= self.threshold:
+                pairs.append((i, j, similarity))
+                clusters.union(i, j)
+
+        groups = {}
+        for i in range(len(docs)):
+            groups.setdefault(clusters.find(i), []).append(i)
+        return pairs, [group for group in groups.values() if len(group) > 1]
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import re
+
+from result_cache import ResultCache
+
+PLAN_CACHE_PATH = os.environ.get("PLAN_CACHE_PATH", ".cache/tool_plans.sqlite")
+PLAN_CACHE_MAX_BYTES = int(os.environ.get("PLAN_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+def normalize_instruction(instruction):
+    text = " ".join((instruction or "").lower().split())
+    return re.sub(r"[\s.!?]+$", "", text)
+
+
+def plan_key(instruction, model, fingerprint):
+    blob = "\0".join((normalize_instruction(instruction), model, fingerprint or ""))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# Memoized LLM tool plans, keyed on instruction shape, model and tool catalog (never the documents)
+class PlanCache:
+    def __init__(self, path=None, max_bytes=None):
+        self.store = ResultCache(path or PLAN_CACHE_PATH, max_bytes or PLAN_CACHE_MAX_BYTES, ttl=0)
+
+    def get(self, instruction, model, fingerprint):
+        return self.store.get(plan_key(instruction, model, fingerprint))
+
+    def put(self, instruction, model, fingerprint, plan):
+        if plan:
+            self.store.put(plan_key(instruction, model, fingerprint), "plan", plan)
+
+    def stats(self):
+        stats = self.store.stats()
+        return {
+            "entries": stats["entries"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "llm_calls_skipped": stats["hits"],
+        }
+
+
+def plan_template(calls, inputs):
+    """
+    Replaces argument values that come from the request inputs with {"$input": name} placeholders.
+    Returns None when any argument doesn't map to an input: a literal value (e.g. a document the
+    LLM copied from a truncated prompt) would otherwise be replayed into other requests.
+    """
+    template = []
+    for call in calls:
+        args = {}
+        for name, value in call.get("args", {}).items():
+            if name in inputs:
+                args[name] = {"$input": name}
+                continue
+            source = next((key for key, given in inputs.items() if given == value), None)
+            if source is None:
+                return None
+            args[name] = {"$input": source}
+        template.append({"tool": call["tool"], "args": args})
+    return template
+
+
+def fill_plan(template, inputs):
+    return [
+        {
+            "tool": call["tool"],
+            "args": {
+                name: inputs[value["$input"]] if isinstance(value, dict) and "$input" in value else value
+                for name, value in call["args"].items()
+            },
+        }
+        for call in template
+    ]
@@ -0,0 +1,167 @@
+import asyncio
+import itertools
+import os
+import time
+
+from mcp_runtime import MCPSessionPool, is_connection_error
+
+# Comma-separated list of equivalent MCP endpoints; falls back to the app's single MCP_SERVER_URL
+MCP_SERVER_URLS = os.environ.get("MCP_SERVER_URLS", "")
+# Seconds between health probes, consecutive failures before a replica is ejected, probe timeout
+MCP_HEALTH_INTERVAL = float(os.environ.get("MCP_HEALTH_INTERVAL", "10"))
+MCP_EJECT_AFTER = int(os.environ.get("MCP_EJECT_AFTER", "3"))
+MCP_HEALTH_TIMEOUT = float(os.environ.get("MCP_HEALTH_TIMEOUT", "5"))
+
+
+def server_urls(default):
+    urls = [url.strip() for url in MCP_SERVER_URLS.split(",") if url.strip()]
+    return urls or [default]
+
+
+class Replica:
+    __slots__ = ("pool", "healthy", "outstanding", "failures", "calls", "ejections", "ejected_at")
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.healthy = True
+        self.outstanding = 0
+        self.failures = 0
+        self.calls = 0
+        self.ejections = 0
+        self.ejected_at = None
+
+    def stats(self):
+        return {
+            "url": self.pool.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "calls": self.calls,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+# Session pools for several equivalent MCP servers behind one MCPClient-compatible surface.
+# Calls go to the healthy replica with the fewest outstanding requests; replicas that keep
+# failing at the transport level are ejected and re-admitted once a background health probe
+# succeeds again. Tool errors are the server's answer and go straight back to the caller.
+class ReplicaPool:
+    def __init__(self, urls, size=None, factory=None, health_interval=None, eject_after=None, health_timeout=None):
+        if isinstance(urls, str):
+            urls = [urls]
+        self.replicas = [Replica(MCPSessionPool(url, size, factory)) for url in urls]
+        self.health_interval = health_interval or MCP_HEALTH_INTERVAL
+        self.eject_after = eject_after or MCP_EJECT_AFTER
+        self.health_timeout = health_timeout or MCP_HEALTH_TIMEOUT
+        self.failovers = 0
+        self.readmissions = 0
+        self._turn = itertools.count()
+        self._health_task = None
+
+    @property
+    def url(self):
+        return ",".join(replica.pool.url for replica in self.replicas)
+
+    def _pick(self, exclude=()):
+        candidates = [r for r in self.replicas if r.healthy and r not in exclude]
+        if not candidates:
+            # Everything is ejected: keep trying rather than failing every call outright
+            candidates = [r for r in self.replicas if r not in exclude]
+        if not candidates:
+            return None
+        # Least outstanding requests; rotate the starting point so ties spread evenly
+        start = next(self._turn) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=lambda r: r.outstanding)
+
+    def _eject(self, replica):
+        if replica.healthy and len(self.replicas) > 1:
+            replica.healthy = False
+            replica.ejections += 1
+            replica.ejected_at = time.monotonic()
+
+    def _readmit(self, replica):
+        if not replica.healthy:
+            self.readmissions += 1
+        replica.healthy = True
+        replica.failures = 0
+        replica.ejected_at = None
+
+    async def _call(self, method, *args, **kwargs):
+        self._ensure_health_checks()
+        tried = []
+        while True:
+            replica = self._pick(exclude=tried)
+            replica.outstanding += 1
+            replica.calls += 1
+            try:
+                result = await getattr(replica.pool, method)(*args, **kwargs)
+            except Exception as e:
+                if not is_connection_error(e):
+                    # The replica answered: a tool error would fail the same way anywhere
+                    replica.failures = 0
+                    raise
+                replica.failures += 1
+                if replica.failures >= self.eject_after:
+                    self._eject(replica)
+                tried.append(replica)
+                # One failover to another replica; tool-level retries are the caller's business
+                if len(tried) >= min(2, len(self.replicas)):
+                    raise
+                self.failovers += 1
+                continue
+            finally:
+                replica.outstanding -= 1
+            replica.failures = 0
+            return result
+
+    async def list_tools(self):
+        return await self._call("list_tools")
+
+    async def invoke(self, tool, **kwargs):
+        return await self._call("invoke", tool, **kwargs)
+
+    async def warm(self):
+        for replica in self.replicas:
+            await replica.pool.warm()
+        self._ensure_health_checks()
+
+    def _ensure_health_checks(self):
+        # Started lazily so the task lives on the loop that serves the calls
+        if len(self.replicas) > 1 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _probe(self, replica):
+        try:
+            await asyncio.wait_for(replica.pool.list_tools(), self.health_timeout)
+        except Exception:
+            replica.failures += 1
+            if replica.failures >= self.eject_after:
+                self._eject(replica)
+            return
+        self._readmit(replica)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            # Idle healthy replicas are probed too, so a dead one is ejected before it eats traffic
+            await asyncio.gather(*[
+                self._probe(replica) for replica in self.replicas
+                if not replica.healthy or replica.outstanding == 0
+            ])
+
+    def stats(self):
+        pools = [replica.pool.stats() for replica in self.replicas]
+        return {
+            "url": self.url,
+            "size": sum(p["size"] for p in pools),
+            "open": sum(p["open"] for p in pools),
+            "in_use": sum(p["in_use"] for p in pools),
+            "handshakes": sum(p["handshakes"] for p in pools),
+            "reuses": sum(p["reuses"] for p in pools),
+            "reconnects": sum(p["reconnects"] for p in pools),
+            "healthy": sum(replica.healthy for replica in self.replicas),
+            "failovers": self.failovers,
+            "readmissions": self.readmissions,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
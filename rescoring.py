@@ -0,0 +1,255 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import telemetry
+from embedding_store import text_key
+from result_cache import normalize_args
+from local_tools import _as_list, format_results
+from minhash import MinHashLSH, _Clusters, shingles
+from result_decoder import decode
+
+# Tools re-scored incrementally; empty disables it. BM25 is deliberately not supported: its IDF
+# and length normalisation depend on the whole set, so one changed line changes every score.
+INCREMENTAL_TOOLS = [
+    name for name in os.environ.get(
+        "INCREMENTAL_TOOLS", "semantic_relevance_scorer,exact_match_checker,redundancy_checker"
+    ).split(",") if name
+]
+# Sessions whose per-document results are kept, least recently used dropped first
+RESCORE_SESSIONS = int(os.environ.get("RESCORE_SESSIONS", "256"))
+# Per-document rows kept per session (least recently used dropped first); a redundancy state
+# that has compared more documents than this starts over
+RESCORE_ROWS = int(os.environ.get("RESCORE_ROWS", "2000"))
+# MinHash sketches kept for the local redundancy path (REDUNDANCY_LOCAL_MIN_DOCS), shared by all sessions
+RESCORE_SKETCHES = int(os.environ.get("RESCORE_SKETCHES", "20000"))
+
+# Scored one document at a time: a document's row doesn't depend on the rest of the set
+PER_DOCUMENT_TOOLS = ("semantic_relevance_scorer", "exact_match_checker")
+# Callers with no session of their own (batch runs, unauthenticated UI users) get no retained state
+SHARED_USERS = ("anonymous", "", None)
+
+
+def _variant(tool, kwargs, *documents):
+    # Everything but the documents: query, threshold, ... A different value is a different result
+    return tool, normalize_args({name: value for name, value in kwargs.items() if name not in documents})
+
+
+class _Pairs:
+    __slots__ = ("pairs", "seen", "approximate", "lock")
+
+    def __init__(self):
+        # Document hashes already compared, and their near-duplicate pairs
+        self.pairs = {}
+        self.seen = set()
+        # True once pairs came from the local MinHash path rather than the server
+        self.approximate = False
+        # One update at a time: the comparisons run in a worker thread
+        self.lock = asyncio.Lock()
+
+
+class _SessionState:
+    __slots__ = ("rows", "redundancy")
+
+    def __init__(self):
+        # (tool, arguments, document hash) -> result row without the document text, LRU-bounded
+        self.rows = OrderedDict()
+        # redundancy_checker: (tool, arguments) -> _Pairs
+        self.redundancy = {}
+
+
+# Per-session view of the client. Per-document tools only send the documents whose results
+# aren't retained yet; redundancy_checker reuses the pairs among documents it has compared.
+class ScoringSession:
+    def __init__(self, scorer, client, state):
+        self.scorer = scorer
+        self.client = client
+        self.state = state
+
+    @property
+    def handles(self):
+        return self.client.handles
+
+    async def list_tools(self):
+        return await self.client.list_tools()
+
+    async def invoke(self, tool, **kwargs):
+        if tool not in self.scorer.tools:
+            return await self.client.invoke(tool, **kwargs)
+        expanded = self.handles.expand(kwargs) if self.handles is not None else kwargs
+        if tool == "redundancy_checker":
+            return await self._redundancy(expanded)
+        if tool in PER_DOCUMENT_TOOLS and isinstance(expanded.get("query"), str) and isinstance(expanded.get("documents"), list):
+            return await self._per_document(tool, expanded)
+        return await self.client.invoke(tool, **kwargs)
+
+    async def _per_document(self, tool, kwargs):
+        docs = _as_list(kwargs["documents"])
+        variant = _variant(tool, {**kwargs, "query": kwargs["query"].strip()}, "documents")
+        rows = self.state.rows
+        found = {}
+        for doc in docs:
+            key = variant + (text_key(doc),)
+            if key in rows:
+                rows.move_to_end(key)
+                found[text_key(doc)] = rows[key]
+        missing = list(dict.fromkeys(doc for doc in docs if text_key(doc) not in found))
+        if missing:
+            result = await self.client.invoke(tool, **{**kwargs, "documents": missing})
+            fresh = decode(result.content).to_dict().get("results")
+            # Rows are matched by their document text, never by position
+            by_document = {
+                text_key(row["document"].strip()): row
+                for row in fresh if isinstance(row, dict) and isinstance(row.get("document"), str)
+            } if isinstance(fresh, list) else {}
+            if any(text_key(doc) not in by_document for doc in missing):
+                # Not a per-document payload we can merge: score the whole set instead
+                return await self.client.invoke(tool, **kwargs)
+            for doc in missing:
+                row = {name: value for name, value in by_document[text_key(doc)].items() if name != "document"}
+                found[text_key(doc)] = rows[variant + (text_key(doc),)] = row
+            while len(rows) > self.scorer.max_rows:
+                rows.popitem(last=False)
+        self.scorer._record(tool, sent=len(missing), reused=len(docs) - len(missing))
+        return SimpleNamespace(content=format_results([{"document": doc, **found[text_key(doc)]} for doc in docs]))
+
+    async def _redundancy(self, kwargs):
+        docs = _as_list(kwargs.get("docs", kwargs.get("documents")) or [])
+        variant = _variant("redundancy_checker", kwargs, "docs", "documents")
+        state = self.state.redundancy.get(variant)
+        if state is None or len(state.seen) > self.scorer.max_rows:
+            state = self.state.redundancy[variant] = _Pairs()
+        keys = [text_key(doc) for doc in docs]
+        new = set(keys) - state.seen
+        threshold = kwargs.get("threshold")
+        local = (
+            self.client.local is not None and self.client.local.handles("redundancy_checker", {"docs": docs})
+            and (threshold is None or threshold == self.scorer.lsh.threshold)
+        )
+        async with state.lock:
+            if not new:
+                # Only removals or reordering: every remaining pair was already compared
+                self.scorer._record("redundancy_checker", sent=0, reused=len(docs))
+            elif local:
+                with telemetry.span("tool_call", tool="redundancy_checker", source="incremental"):
+                    # MinHash and Jaccard are CPU work: off the shared event loop
+                    await asyncio.to_thread(self._compare_new, state, docs, keys, new)
+                state.approximate = True
+                self.scorer._record("redundancy_checker", sent=len(new), reused=len(docs) - len(new))
+            else:
+                # The server only compares whole sets; its pairs are kept for the next edit
+                extra = {name: value for name, value in kwargs.items() if name not in ("docs", "documents")}
+                result = await self.client.invoke("redundancy_checker", docs=docs, **extra)
+                pairs = decode(result.content).to_dict().get("results")
+                if not isinstance(pairs, list):
+                    return result
+                state.pairs = {
+                    tuple(sorted((text_key(pair["document_1"]), text_key(pair["document_2"])))): pair["similarity"]
+                    for pair in pairs
+                }
+                state.seen = set(keys)
+                state.approximate = False
+                self.scorer._record("redundancy_checker", sent=len(docs), reused=0)
+            return SimpleNamespace(content=await asyncio.to_thread(self._render_pairs, state, docs, keys))
+
+    def _compare_new(self, state, docs, keys, new):
+        # Same candidates and Jaccard as MinHashLSH.near_duplicates, but only pairs
+        # touching a new document are measured; signatures are cached per document
+        lsh = self.scorer.lsh
+        sketches = [self.scorer.sketch(doc, key) for doc, key in zip(docs, keys)]
+        sets = [hashes for hashes, _ in sketches]
+        signatures = [signature for _, signature in sketches]
+        for i, j in lsh.candidates(signatures):
+            if keys[i] not in new and keys[j] not in new:
+                continue
+            similarity = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+            if similarity >= lsh.threshold:
+                state.pairs[tuple(sorted((keys[i], keys[j])))] = similarity
+        state.seen |= new
+
+    def _render_pairs(self, state, docs, keys):
+        positions = {}
+        for i, key in enumerate(keys):
+            positions.setdefault(key, []).append(i)
+        found = []
+        for (a, b), similarity in state.pairs.items():
+            for i in positions.get(a, ()):
+                for j in positions.get(b, ()):
+                    if i != j:
+                        found.append((min(i, j), max(i, j), similarity))
+        found = sorted(set(found))
+        clusters = _Clusters(len(docs))
+        for i, j, _ in found:
+            clusters.union(i, j)
+        groups = {}
+        for i in range(len(docs)):
+            groups.setdefault(clusters.find(i), []).append(i)
+        results = [
+            {"document_1": docs[i], "document_2": docs[j], "similarity": round(similarity, 4)}
+            for i, j, similarity in found
+        ]
+        payload = {"results": results, "clusters": [g for g in groups.values() if len(g) > 1]}
+        if state.approximate:
+            payload["approximate"] = True
+        return "root=" + repr(payload)
+
+
+# Incremental re-scoring for users who edit a line or two and evaluate again: results are
+# kept per session and tool, keyed by arguments and document hash, and merged with the new ones
+class IncrementalScorer:
+    def __init__(self, tools=None, max_sessions=None, lsh=None, max_rows=None):
+        self.tools = INCREMENTAL_TOOLS if tools is None else list(tools)
+        self.max_sessions = max_sessions or RESCORE_SESSIONS
+        self.max_rows = max_rows or RESCORE_ROWS
+        self.lsh = lsh or MinHashLSH()
+        self.sent = 0
+        self.reused = 0
+        self._sessions = OrderedDict()
+        self._sketches = OrderedDict()
+        # Sketches are shared by every session's worker threads
+        self._sketch_lock = threading.Lock()
+
+    def session(self, client, user="anonymous"):
+        """
+        The client as seen by `user`'s session; unchanged for callers without a session of their own.
+        """
+        if user in SHARED_USERS:
+            return client
+        state = self._sessions.get(user)
+        if state is None:
+            state = self._sessions[user] = _SessionState()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(user)
+        return ScoringSession(self, client, state)
+
+    def sketch(self, doc, key):
+        """
+        (shingle set, MinHash signature) for a document, computed once per distinct text.
+        """
+        with self._sketch_lock:
+            sketch = self._sketches.get(key)
+        if sketch is None:
+            hashes = shingles(doc)
+            sketch = (hashes, self.lsh.signature(hashes))
+            with self._sketch_lock:
+                self._sketches[key] = sketch
+                while len(self._sketches) > RESCORE_SKETCHES:
+                    self._sketches.popitem(last=False)
+        return sketch
+
+    def _record(self, tool, sent, reused):
+        self.sent += sent
+        self.reused += reused
+        telemetry.metrics.inc("rag_rescored_documents_total", sent, tool=tool)
+        telemetry.metrics.inc("rag_reused_documents_total", reused, tool=tool)
+
+    def stats(self):
+        return {
+            "tools": self.tools,
+            "sessions": len(self._sessions),
+            "sent": self.sent,
+            "reused": self.reused,
+        }
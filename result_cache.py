@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", ".cache/tool_results.sqlite")
+# Total payload bytes kept before least-recently-used entries are evicted
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Seconds before an entry expires; 0 keeps entries until evicted
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "0"))
+
+
+def normalize_args(args):
+    return json.dumps(args, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def result_key(tool, args, fingerprint=None, url=None):
+    # The cache file is shared by every app, so the server is part of the key
+    blob = "\0".join((url or "", tool, fingerprint or "", normalize_args(args)))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _is_error(result):
+    # mcp renamed CallToolResult.isError to is_error
+    return bool(
+        getattr(result, "error_code", 0) or getattr(result, "is_error", False) or getattr(result, "isError", False)
+    )
+
+
+def _blocks(content):
+    # mcp's TextContent & co. are pydantic models: store their fields, not their repr
+    if isinstance(content, (list, tuple)):
+        return [block.model_dump(mode="json") if hasattr(block, "model_dump") else block for block in content]
+    return content
+
+
+# Persistent, size-bounded LRU cache of tool results, shared across processes via SQLite
+class ResultCache:
+    def __init__(self, path=None, max_bytes=None, ttl=None):
+        self.path = path or RESULT_CACHE_PATH
+        self.max_bytes = max_bytes or RESULT_CACHE_MAX_BYTES
+        self.ttl = RESULT_CACHE_TTL if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, tool TEXT, value TEXT, size INTEGER,"
+            " created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        # Running estimate of the payload size; resynced from disk before evicting
+        self._bytes = self._total()
+
+    def _total(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        payload = json.loads(row[0])
+        if "content" in payload:
+            return SimpleNamespace(content=payload["content"], cached=True)
+        return payload["value"]
+
+    def put(self, key, tool, result):
+        if _is_error(result):
+            return
+        # MCP results are stored by content; plain values (e.g. smolagents call_tool output) as-is
+        payload = {"content": _blocks(result.content)} if hasattr(result, "content") else {"value": result}
+        value = json.dumps(payload, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool, value, len(value), now, now),
+            )
+            self._bytes += len(value)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        total = self._total()
+        self._bytes = total
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used rows until we are back under the budget
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", stale)
+        self._bytes = total - freed
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "network_calls_avoided": self.hits,
+        }
+
+
+async def cached_invoke(cache, tool, args, fingerprint, invoke, url=None):
+    """
+    Returns the cached result for (url, tool, args, fingerprint) or awaits invoke() and stores it.
+    """
+    key = result_key(tool, args, fingerprint, url)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    result = await invoke()
+    cache.put(key, tool, result)
+    return result
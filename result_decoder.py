@@ -0,0 +1,208 @@
+import ast
+import json
+from array import array
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def _loads(text):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+# Compact typed records for the scoring tools' payloads
+
+class ScoreResults:
+    __slots__ = ("documents", "scores")
+
+    def __init__(self, documents, scores):
+        self.documents = documents
+        self.scores = array("d", scores)
+
+    def ranking(self):
+        return sorted(range(len(self.scores)), key=self.scores.__getitem__, reverse=True)
+
+    def to_dict(self):
+        return {"results": [{"document": d, "score": s} for d, s in zip(self.documents, self.scores)]}
+
+    def render(self):
+        if not self.documents:
+            return "⚠️ No relevance scores returned."
+        return "\n".join(
+            f"- Doc {i + 1} — Score: {score:.4f}\n  > {doc}"
+            for i, (doc, score) in enumerate(zip(self.documents, self.scores))
+        )
+
+
+class CascadeResults:
+    __slots__ = ("documents", "scores", "stages", "lexical")
+
+    def __init__(self, documents, scores, stages, lexical):
+        self.documents = documents
+        # Documents pruned by the lexical stage have no semantic score (NaN)
+        self.scores = array("d", (float("nan") if score is None else score for score in scores))
+        self.stages = stages
+        self.lexical = array("d", lexical)
+
+    def to_dict(self):
+        return {
+            "results": [
+                {"document": d, "score": None if s != s else s, "stage": st, "bm25": b}
+                for d, s, st, b in zip(self.documents, self.scores, self.stages, self.lexical)
+            ]
+        }
+
+    def render(self):
+        semantic = sum(stage == "semantic" for stage in self.stages)
+        lines = [f"🪜 Cascade: {semantic}/{len(self.documents)} documents passed BM25 to semantic scoring"]
+        for i, (doc, score, stage, bm25) in enumerate(zip(self.documents, self.scores, self.stages, self.lexical)):
+            if stage == "semantic":
+                lines.append(f"- Doc {i + 1} — Score: {score:.4f} (🤝 semantic, BM25 {bm25:.4f})\n  > {doc}")
+            else:
+                lines.append(f"- Doc {i + 1} — ✂️ pruned by BM25 ({bm25:.4f})\n  > {doc}")
+        return "\n".join(lines)
+
+
+class MatchResults:
+    __slots__ = ("documents", "matches")
+
+    def __init__(self, documents, matches):
+        self.documents = documents
+        self.matches = array("b", (bool(m) for m in matches))
+
+    def to_dict(self):
+        return {"results": [{"document": d, "exact_match": bool(m)} for d, m in zip(self.documents, self.matches)]}
+
+    def render(self):
+        if not self.documents:
+            return "⚠️ No exact-match results returned."
+        return "\n".join(
+            f"- Doc {i + 1} — {'✅ exact match' if match else '❌ no match'}\n  > {doc}"
+            for i, (doc, match) in enumerate(zip(self.documents, self.matches))
+        )
+
+
+class RedundancyResults:
+    __slots__ = ("first", "second", "similarities", "clusters", "approximate")
+
+    def __init__(self, first, second, similarities, clusters=(), approximate=False):
+        self.first = first
+        self.second = second
+        self.similarities = array("d", similarities)
+        self.clusters = [list(cluster) for cluster in clusters]
+        self.approximate = approximate
+
+    def to_dict(self):
+        data = {
+            "results": [
+                {"document_1": a, "document_2": b, "similarity": s}
+                for a, b, s in zip(self.first, self.second, self.similarities)
+            ],
+            "clusters": self.clusters,
+        }
+        if self.approximate:
+            data["approximate"] = True
+        return data
+
+    def render(self):
+        # MinHash/LSH results: Jaccard over shingles, and pairs near the threshold may be missed
+        note = "≈ Approximate (MinHash/LSH) near-duplicate check." if self.approximate else None
+        if not self.similarities:
+            return "\n".join(filter(None, [note, "✅ No redundant documents found."]))
+        lines = [note] if note else []
+        lines += [
+            f"- Similarity {s:.4f}\n  > {a}\n  > {b}"
+            for a, b, s in zip(self.first, self.second, self.similarities)
+        ]
+        if self.clusters:
+            lines.append(f"🔁 {len(self.clusters)} near-duplicate cluster(s): {self.clusters}")
+        return "\n".join(lines)
+
+
+class RawResult:
+    __slots__ = ("text", "data")
+
+    def __init__(self, text, data=None):
+        self.text = text
+        self.data = data
+
+    def to_dict(self):
+        return self.data if isinstance(self.data, dict) else {"text": self.text}
+
+    def render(self):
+        return self.text
+
+
+def _block_text(block):
+    # TextContent, or the dict the result cache stores it as
+    text = block.get("text") if isinstance(block, dict) else getattr(block, "text", None)
+    return text or str(block)
+
+
+def _text(content):
+    # MCP content blocks ([TextContent, ...]) or a plain string
+    if isinstance(content, (list, tuple)):
+        return "\n".join(_block_text(block) for block in content)
+    return content if isinstance(content, str) else str(content)
+
+
+def _parse(text):
+    stripped = text.strip()
+    if stripped.startswith(("{", "[")):
+        try:
+            return _loads(stripped)
+        except ValueError:
+            pass
+    # Legacy pydantic RootModel repr: root={'results': [...]}
+    if stripped.startswith("root="):
+        try:
+            return ast.literal_eval(stripped[len("root="):])
+        except (ValueError, SyntaxError):
+            pass
+    return None
+
+
+def _empty(tool):
+    # An empty list says nothing about its shape, so the tool name picks the record
+    if tool is None:
+        return RawResult("ℹ️ No results returned.", {"results": []})
+    if "redundancy" in tool:
+        return RedundancyResults([], [], [])
+    if "exact_match" in tool:
+        return MatchResults([], [])
+    return ScoreResults([], [])
+
+
+def decode(content, tool=None):
+    """
+    Decodes a tool result's content (structured dict, JSON text or legacy `root=` repr)
+    into ScoreResults / CascadeResults / MatchResults / RedundancyResults, or RawResult when unrecognised.
+    Pass the tool name so an empty result decodes to that tool's record.
+    """
+    data = content if isinstance(content, dict) else _parse(_text(content))
+    rows = data.get("results") if isinstance(data, dict) else data if isinstance(data, list) else None
+    if isinstance(rows, list) and all(isinstance(row, dict) for row in rows):
+        if rows and all("stage" in row and "bm25" in row for row in rows):
+            return CascadeResults(
+                [row.get("document", "") for row in rows],
+                [row.get("score") for row in rows],
+                [row["stage"] for row in rows],
+                [float(row["bm25"]) for row in rows],
+            )
+        if rows and all("score" in row for row in rows):
+            return ScoreResults([row.get("document", "") for row in rows], [float(row["score"]) for row in rows])
+        if rows and all("exact_match" in row for row in rows):
+            return MatchResults([row.get("document", "") for row in rows], [row["exact_match"] for row in rows])
+        if all("similarity" in row for row in rows) and (rows or "clusters" in data):
+            return RedundancyResults(
+                [row.get("document_1", "") for row in rows],
+                [row.get("document_2", "") for row in rows],
+                [float(row["similarity"]) for row in rows],
+                data.get("clusters", ()) if isinstance(data, dict) else (),
+                bool(data.get("approximate")) if isinstance(data, dict) else False,
+            )
+        if not rows:
+            return _empty(tool)
+    return RawResult(_text(content), data)
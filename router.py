@@ -0,0 +1,124 @@
+import os
+import re
+
+from eval_tools import SCORING_TOOLS
+
+# Minimum rule score for the router to act without asking the LLM
+ROUTER_CONFIDENCE = float(os.environ.get("ROUTER_CONFIDENCE", "0.6"))
+
+RELEVANCE_TOOLS = ("bm25_relevance_scorer", "semantic_relevance_scorer")
+
+# (tool, pattern, weight) — weights for the same tool add up, capped at 1.0.
+# A tuple of tools is a generic rule: it only applies when none of those tools
+# already matched a specific rule. "*" applies the weight to every scoring tool.
+DEFAULT_RULES = [
+    ("bm25_relevance_scorer", r"\bbm25\b", 1.0),
+    ("bm25_relevance_scorer", r"\blexical", 1.0),
+    ("bm25_relevance_scorer", r"\bkeywords?\b", 0.8),
+    ("bm25_relevance_scorer", r"\bterm (overlap|frequency)", 0.8),
+    ("semantic_relevance_scorer", r"\bsemantic", 1.0),
+    ("semantic_relevance_scorer", r"\bembedding", 1.0),
+    ("semantic_relevance_scorer", r"\bmeaning", 0.7),
+    ("semantic_relevance_scorer", r"\bsimilarity\b", 0.5),
+    ("redundancy_checker", r"\bredundan", 1.0),
+    ("redundancy_checker", r"\brepetit", 1.0),
+    ("redundancy_checker", r"\bduplicat", 1.0),
+    ("redundancy_checker", r"\brepeat", 0.8),
+    # "exact match", not "exactly": "tell me exactly how relevant..." is about relevance
+    ("exact_match_checker", r"\bexact[- ]match", 1.0),
+    ("exact_match_checker", r"\bverbatim\b", 1.0),
+    ("exact_match_checker", r"\bliteral\b", 0.7),
+    ("exact_match_checker", r"\bmatch(es|ing)?\b", 0.5),
+    # Generic relevance requests get both relevance scorers
+    (RELEVANCE_TOOLS, r"\brelevan(ce|t)\b", 0.7),
+    ("*", r"\b(all|every|full|comprehensive|thorough(ly)?)\b.*\b(tools?|metrics?|evaluation|checks?)\b", 1.0),
+]
+
+# Tools answering the same kind of question; rules for different families firing together
+# ("check relevant documents for redundancy") are ambiguous, so the LLM decides
+TOOL_FAMILIES = {
+    "bm25_relevance_scorer": "relevance",
+    "semantic_relevance_scorer": "relevance",
+    "redundancy_checker": "redundancy",
+    "exact_match_checker": "exact_match",
+}
+
+# Phrasings the keyword rules cannot interpret safely
+NEGATION = re.compile(r"\b(not|without|except|instead of|don'?t|skip|ignore)\b")
+
+
+class RoutePlan:
+    __slots__ = ("tools", "confidence", "scores")
+
+    def __init__(self, tools, confidence, scores):
+        self.tools = tools
+        self.confidence = confidence
+        self.scores = scores
+
+    def __repr__(self):
+        return f"RoutePlan(tools={self.tools}, confidence={self.confidence:.2f})"
+
+
+# Maps stock task instructions to a tool plan without an LLM round-trip
+class InstructionRouter:
+    def __init__(self, rules=None, threshold=None, tools=SCORING_TOOLS):
+        self.tools = tuple(tools)
+        self.threshold = ROUTER_CONFIDENCE if threshold is None else threshold
+        self.rules = [
+            (tool, re.compile(pattern, re.IGNORECASE), weight)
+            for tool, pattern, weight in (DEFAULT_RULES if rules is None else rules)
+        ]
+        self.routed = 0
+        self.fallbacks = 0
+
+    def plan(self, instruction):
+        """
+        Scores the instruction against the rules without touching the counters.
+        """
+        text = " ".join((instruction or "").lower().split())
+        scores = dict.fromkeys(self.tools, 0.0)
+        generic = []
+        everything = False
+        for tool, pattern, weight in self.rules:
+            if not pattern.search(text):
+                continue
+            everything |= tool == "*"
+            if isinstance(tool, tuple):
+                generic.append((tool, weight))
+                continue
+            for name in (self.tools if tool == "*" else (tool,)):
+                if name in scores:
+                    scores[name] = min(1.0, scores[name] + weight)
+        for group, weight in generic:
+            if not any(scores.get(name) for name in group):
+                for name in group:
+                    if name in scores:
+                        scores[name] = min(1.0, scores[name] + weight)
+
+        selected = [tool for tool in self.tools if scores[tool] >= self.threshold]
+        confidence = min(scores[tool] for tool in selected) if selected else 0.0
+        if NEGATION.search(text):
+            confidence /= 2
+        if not everything and len({TOOL_FAMILIES.get(tool, tool) for tool in selected}) > 1:
+            confidence /= 2
+        return RoutePlan(selected, confidence, scores)
+
+    def route(self, instruction):
+        """
+        Returns a RoutePlan when the rules are confident, otherwise None so the caller asks the LLM.
+        """
+        plan = self.plan(instruction)
+        if plan.tools and plan.confidence >= self.threshold:
+            self.routed += 1
+            return plan
+        self.fallbacks += 1
+        return None
+
+    def stats(self):
+        total = self.routed + self.fallbacks
+        return {
+            "requests": total,
+            "hit_rate": self.routed / total if total else 0.0,
+            "llm_calls_saved": self.routed,
+            "fallbacks": self.fallbacks,
+        }
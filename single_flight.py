@@ -0,0 +1,131 @@
+import asyncio
+
+import telemetry
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+# One in-flight async generator replayed to every follower, late joiners included
+class _SharedStream:
+    def __init__(self, agen):
+        self.agen = agen
+        self.items = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+        self.task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def pump(self):
+        try:
+            async for item in self.agen:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+            await self.agen.aclose()
+
+    async def follow(self):
+        i = 0
+        while True:
+            changed = self._changed
+            while i < len(self.items):
+                yield self.items[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await changed.wait()
+
+
+# Coalesces identical concurrent work: callers with the same key share one in-flight
+# result (do) or one in-flight stream (stream) instead of repeating the remote calls.
+# The shared work is cancelled only when every caller waiting on it has gone away.
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._streams = {}
+
+    def _joined(self):
+        self.coalesced += 1
+        telemetry.metrics.inc("rag_single_flight_coalesced_total", flight=self.name)
+
+    @staticmethod
+    def _forget(table, key, entry):
+        if table.get(key) is entry:
+            del table[key]
+        task = entry.task
+        if not task.cancelled():
+            task.exception()  # retrieved here so an abandoned failure isn't reported as unhandled
+
+    def in_flight(self, key):
+        return key in self._calls or key in self._streams
+
+    async def do(self, key, fn):
+        """
+        Awaits `fn()` for the first caller with this key; concurrent callers share its result.
+        """
+        flight = self._calls.get(key)
+        if flight is None:
+            self.leaders += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(self._calls, key, flight))
+        else:
+            self._joined()
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def stream(self, key, make):
+        """
+        Iterates `make()` for the first caller with this key; concurrent callers receive
+        the same items, replayed from the start.
+        """
+        shared = self._streams.get(key)
+        if shared is None:
+            self.leaders += 1
+            shared = _SharedStream(make())
+            self._streams[key] = shared
+            shared.task = asyncio.ensure_future(shared.pump())
+            shared.task.add_done_callback(lambda _: self._forget(self._streams, key, shared))
+        else:
+            self._joined()
+        shared.followers += 1
+        try:
+            async for item in shared.follow():
+                yield item
+        finally:
+            shared.followers -= 1
+            if shared.followers == 0 and not shared.task.done():
+                shared.task.cancel()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+
+import telemetry
+from eval_tools import tool_arguments
+from result_cache import result_key
+
+# Remote tools started while the LLM is still choosing, e.g. "semantic_relevance_scorer".
+# Empty (the default) turns speculation off; tools the local backend answers are never speculated.
+SPECULATE_TOOLS = tuple(tool.strip() for tool in os.environ.get("SPECULATE_TOOLS", "").split(",") if tool.strip())
+
+
+# Speculative calls for one request. A planned call matching a speculative one (same tool,
+# same arguments) goes through the client as usual: its SingleFlight joins the call still in
+# flight and its result cache serves one that finished. This wrapper only does the accounting.
+class Speculation:
+    def __init__(self, speculator, client, query, docs):
+        self.speculator = speculator
+        self.client = client
+        self.calls = {}
+        self.used = []
+        for tool in speculator.tools:
+            kwargs = tool_arguments(tool, query, docs)
+            if speculator.local is not None and speculator.local.handles(tool, kwargs):
+                # In-process already: nothing to overlap with the LLM call
+                continue
+            self.calls[result_key(tool, kwargs)] = {
+                "tool": tool,
+                "task": asyncio.ensure_future(client.invoke(tool, **kwargs)),
+                "started": time.monotonic(),
+                "finished": None,
+            }
+        for call in self.calls.values():
+            call["task"].add_done_callback(lambda _, call=call: call.update(finished=time.monotonic()))
+        self.tasks = [call["task"] for call in self.calls.values()]
+
+    async def list_tools(self):
+        return await self.client.list_tools()
+
+    async def invoke(self, tool, **kwargs):
+        expanded = self.client.handles.expand(kwargs) if self.client.handles is not None else kwargs
+        call = self.calls.pop(result_key(tool, expanded), None)
+        if call is not None:
+            # Saved: the part of the call that already ran before the plan asked for it
+            now = time.monotonic()
+            saved = (call["finished"] or now) - call["started"]
+            self.used.append((tool, saved))
+            self.speculator._record("used", tool, saved)
+        return await self.client.invoke(tool, **kwargs)
+
+    def close(self):
+        """
+        Cancels the speculative calls the plan didn't use and returns a one-line report.
+        """
+        wasted = []
+        now = time.monotonic()
+        for task in self.tasks:
+            if task.done() and not task.cancelled():
+                task.exception()  # retrieved so a failure the plan joined elsewhere isn't reported as unhandled
+        for call in self.calls.values():
+            call["task"].cancel()
+            seconds = (call["finished"] or now) - call["started"]
+            wasted.append((call["tool"], seconds))
+            self.speculator._record("wasted", call["tool"], seconds)
+        self.calls = {}
+        parts = [f"{tool} saved {seconds:.2f}s" for tool, seconds in self.used]
+        parts += [f"{tool} discarded ({seconds:.2f}s wasted)" for tool, seconds in wasted]
+        return "🔮 Speculation: " + ", ".join(parts) if parts else ""
+
+
+# Opt-in speculative execution of deterministic remote tools (SPECULATE_TOOLS) while the
+# LLM call is in flight. Tracks latency saved and work wasted across requests.
+class Speculator:
+    def __init__(self, tools=None, local=None):
+        self.tools = SPECULATE_TOOLS if tools is None else tuple(tools)
+        # The client's local backend: tools it handles are skipped
+        self.local = local
+        self.used = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.tools)
+
+    def start(self, client, query, docs):
+        """
+        Starts the speculative calls for a request; returns None when speculation is off.
+        """
+        if not self.enabled:
+            return None
+        return Speculation(self, client, query, docs)
+
+    def _record(self, outcome, tool, seconds):
+        if outcome == "used":
+            self.used += 1
+            self.saved_seconds += seconds
+        else:
+            self.wasted += 1
+            self.wasted_seconds += seconds
+        telemetry.metrics.inc("rag_speculative_calls_total", outcome=outcome, tool=tool)
+        telemetry.metrics.inc("rag_speculative_seconds_total", seconds, outcome=outcome, tool=tool)
+
+    def stats(self):
+        return {
+            "tools": list(self.tools),
+            "used": self.used,
+            "wasted": self.wasted,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "wasted_seconds": round(self.wasted_seconds, 3),
+        }
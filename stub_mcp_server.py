@@ -0,0 +1,77 @@
+"""
+Local stand-in for the RAG evaluation MCP server, for offline benchmarks and tests.
+
+Exposes the four scoring tools over SSE with the same names, arguments and
+`root={'results': [...]}` payloads as the hosted server, plus an optional
+artificial latency per call.
+
+    python stub_mcp_server.py --port 8765 --latency 0.05
+"""
+import argparse
+import asyncio
+from typing import List
+
+from fastmcp import FastMCP
+
+import local_tools
+from embedding_store import HashingEmbedder, cosine_scores
+from minhash import shingles
+
+
+def build_server(latency=0.0, name="rag-eval-stub"):
+    mcp = FastMCP(name)
+    embedder = HashingEmbedder()
+
+    @mcp.tool
+    async def bm25_relevance_scorer(query: str, documents: List[str]) -> str:
+        """Lexical relevance of each document to the query (BM25)."""
+        await asyncio.sleep(latency)
+        return local_tools.bm25_relevance_scorer(query, documents)
+
+    @mcp.tool
+    async def semantic_relevance_scorer(query: str, documents: List[str]) -> str:
+        """Semantic relevance of each document to the query (embedding cosine)."""
+        await asyncio.sleep(latency)
+        docs = local_tools._as_list(documents)
+        if not docs:
+            return local_tools.format_results([])
+        vectors = embedder([query] + docs)
+        scores = cosine_scores(vectors[0], vectors[1:])
+        return local_tools.format_results([
+            {"document": doc, "score": round(float(score), 4)} for doc, score in zip(docs, scores)
+        ])
+
+    @mcp.tool
+    async def redundancy_checker(docs: List[str]) -> str:
+        """Pairwise redundancy between documents."""
+        await asyncio.sleep(latency)
+        docs = local_tools._as_list(docs)
+        sets = [shingles(doc) for doc in docs]
+        results = []
+        for i in range(len(docs)):
+            for j in range(i + 1, len(docs)):
+                similarity = len(sets[i] & sets[j]) / (len(sets[i] | sets[j]) or 1)
+                if similarity >= 0.5:
+                    results.append({"document_1": docs[i], "document_2": docs[j], "similarity": round(similarity, 4)})
+        return "root=" + repr({"results": results})
+
+    @mcp.tool
+    async def exact_match_checker(query: str, documents: List[str]) -> str:
+        """Whether each document contains the query verbatim."""
+        await asyncio.sleep(latency)
+        return local_tools.exact_match_checker(query, documents)
+
+    return mcp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in RAG evaluation MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every tool call")
+    args = parser.parse_args(argv)
+    build_server(args.latency).run(transport="sse", host=args.host, port=args.port, show_banner=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus scrape port for the entry points (0 disables); JSON request logs go to stderr or TELEMETRY_LOG
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+# Interface /metrics and /ready bind to; set 0.0.0.0 to expose them beyond this host
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+TELEMETRY_LOG = os.environ.get("TELEMETRY_LOG", "")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger("rag_eval.telemetry")
+if not logger.handlers:
+    _handler = logging.FileHandler(TELEMETRY_LOG) if TELEMETRY_LOG else logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+# In-process counters and histograms, rendered in the Prometheus text format
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts, total = self._histograms.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._histograms[key] = (counts, total + value)
+            self._counters[(name + "_count", key[1])] = self._counters.get((name + "_count", key[1]), 0) + 1
+
+    def value(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render(self):
+        def fmt(labels, extra=()):
+            pairs = [f'{k}="{v}"' for k, v in (*labels, *extra)]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines, typed = [], set()
+        with self._lock:
+            histograms = {name for name, _ in self._histograms}
+            for (name, labels), value in sorted(self._counters.items()):
+                if name.endswith("_count") and name[:-len("_count")] in histograms:
+                    continue
+                if name not in typed:
+                    typed.add(name)
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{fmt(labels)} {value}")
+            for (name, labels), (counts, total) in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{name}_bucket{fmt(labels, [('le', bound)])} {count}")
+                observed = self._counters[(name + "_count", labels)]
+                lines.append(f"{name}_bucket{fmt(labels, [('le', '+Inf')])} {observed}")
+                lines.append(f"{name}_sum{fmt(labels)} {total}")
+                lines.append(f"{name}_count{fmt(labels)} {observed}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("rag_request_seconds", "End-to-end evaluation request latency.")
+metrics.describe("rag_stage_seconds", "Latency per stage: prompt_build, llm_decision, tool_discovery, tool_execution, tool_call, render.")
+metrics.describe("rag_llm_tokens_total", "LLM tokens by model and direction.")
+metrics.describe("rag_tool_bytes_total", "Tool payload bytes on the wire by tool and direction.")
+
+_current = contextvars.ContextVar("rag_eval_trace", default=None)
+_readiness = None
+
+
+def set_readiness(readiness):
+    # Anything with .ready and .stats(); served on /ready for load balancer and pod probes
+    global _readiness
+    _readiness = readiness
+
+
+# One evaluation request: its spans, token counts and bytes, logged as a single JSON line when finished
+class Trace:
+    def __init__(self, app, **attrs):
+        self.app = app
+        self.attrs = attrs
+        self.request_id = uuid.uuid4().hex[:16]
+        self.status = "ok"
+        self.spans = []
+        self.tokens = {"input": 0, "output": 0}
+        self.bytes = {"out": 0, "in": 0}
+        self.started = time.perf_counter()
+
+    def span(self, stage, **attrs):
+        return span(stage, trace=self, **attrs)
+
+    def finish(self):
+        seconds = time.perf_counter() - self.started
+        metrics.observe("rag_request_seconds", seconds, app=self.app, status=self.status)
+        stages = {}
+        for record in self.spans:
+            stages[record["stage"]] = round(stages.get(record["stage"], 0.0) + record["seconds"], 6)
+        logger.info(json.dumps({
+            "event": "request",
+            "app": self.app,
+            "request_id": self.request_id,
+            "status": self.status,
+            "seconds": round(seconds, 6),
+            **self.attrs,
+            "stages": stages,
+            "tokens": self.tokens,
+            "bytes": self.bytes,
+            "spans": self.spans,
+        }, default=str))
+
+
+def current():
+    return _current.get()
+
+
+def _restore(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # A streamed generator finished in another context; the one that set the trace is gone
+        pass
+
+
+@contextmanager
+def request(app, **attrs):
+    """
+    Opens a request trace and binds it to the current context, so spans recorded further
+    down (tool calls, LLM usage) attach to it. Streamed generators may resume in a fresh
+    context, so stages there use trace.span(), which binds the trace again.
+    """
+    trace = Trace(app, **attrs)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except GeneratorExit:
+        trace.status = "cancelled"
+        raise
+    except BaseException as e:
+        trace.status = "cancelled" if type(e).__name__ == "CancelledError" else "error"
+        raise
+    finally:
+        trace.finish()
+        _restore(token)
+
+
+@contextmanager
+def span(stage, trace=None, **attrs):
+    """
+    Times one stage. The yielded dict can be filled with extra attributes (bytes, source, ...).
+    """
+    trace = trace or _current.get()
+    token = _current.set(trace) if trace is not None else None
+    record = {"stage": stage, **attrs}
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 6)
+        app = trace.app if trace is not None else ""
+        metrics.observe("rag_stage_seconds", record["seconds"], app=app, stage=stage, tool=attrs.get("tool", ""))
+        if trace is not None:
+            trace.spans.append(record)
+        if token is not None:
+            _restore(token)
+
+
+def _usage_value(usage, *names):
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if value is not None:
+            return int(value)
+    return 0
+
+
+def record_usage(model, usage):
+    """
+    Counts LLM tokens from an OpenAI `usage` or smolagents `TokenUsage` (dict or object); None is ignored.
+    """
+    if usage is None:
+        return
+    tokens_in = _usage_value(usage, "prompt_tokens", "input_tokens")
+    tokens_out = _usage_value(usage, "completion_tokens", "output_tokens")
+    metrics.inc("rag_llm_tokens_total", tokens_in, model=model, kind="input")
+    metrics.inc("rag_llm_tokens_total", tokens_out, model=model, kind="output")
+    trace = _current.get()
+    if trace is not None:
+        trace.tokens["input"] += tokens_in
+        trace.tokens["output"] += tokens_out
+
+
+def payload_bytes(value):
+    # Size of tool arguments or MCP content blocks as they travel on the wire
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple)) and all(hasattr(block, "text") for block in value):
+        return sum(len((block.text or "").encode("utf-8")) for block in value)
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def record_bytes(tool, sent, received, record=None):
+    metrics.inc("rag_tool_bytes_total", sent, tool=tool, direction="out")
+    metrics.inc("rag_tool_bytes_total", received, tool=tool, direction="in")
+    if record is not None:
+        record["bytes_out"], record["bytes_in"] = sent, received
+    trace = _current.get()
+    if trace is not None:
+        trace.bytes["out"] += sent
+        trace.bytes["in"] += received
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/ready":
+            ready = _readiness is None or _readiness.ready
+            stats = _readiness.stats() if _readiness is not None else {"ready": True}
+            self._send(200 if ready else 503, "application/json", json.dumps(stats))
+        elif path in ("/metrics", "/"):
+            self._send(200, "text/plain; version=0.0.4", metrics.render())
+        else:
+            self.send_error(404)
+
+    def _send(self, status, content_type, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Serves /metrics in a daemon thread. Returns the server, or None if disabled or the port is taken.
+    """
+    port = METRICS_PORT if port is None else port
+    host = METRICS_HOST if host is None else host
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.info(json.dumps({"event": "metrics_server_unavailable", "port": port, "error": str(e)}))
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,18 +1,23 @@
+import asyncio
 import gradio as gr
 import os
 import traceback
 from types import SimpleNamespace
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from mcp import StdioServerParameters
-from smolagents import CodeAgent, MCPClient
+import telemetry
+from call_policy import BlockingCalls, CallPolicy
+from mcp_runtime import run_async, run_sync, runtime
+from admission import ADMIT_CONCURRENCY, AdmissionController, Busy, user_key
+from warmup import Lazy, Readiness
 
 load_dotenv()
 
 # ✅ OpenAI-compatible model class
 class OpenAIModel:
     def __init__(self, api_key, model="gpt-3.5-turbo"):
+        from openai import OpenAI  # ~1s import, paid during warm-up rather than before the UI binds
+
         self.client = OpenAI(api_key=api_key)
         self.model = model
 
@@ -32,15 +37,17 @@ class OpenAIModel:
         elif not isinstance(prompt, str):
             prompt = str(prompt)
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=kwargs.get("temperature", 0.3),
-            max_tokens=kwargs.get("max_tokens", 1024)
-        )
+        with telemetry.span("llm_decision", model=self.model):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=kwargs.get("temperature", 0.3),
+                max_tokens=kwargs.get("max_tokens", 1024)
+            )
+        telemetry.record_usage(self.model, response.usage)
 
         return SimpleNamespace(
             content=response.choices[0].message.content.strip(),
@@ -57,57 +64,84 @@ class OpenAIModel:
 # ✅ MCP Server URL
 MCP_SERVER_URL = "https://f4ee6c74c383f1d905.gradio.live/gradio_api/mcp/sse"
 
-try:
-    # 🔌 Connect to MCP server
-    mcp_client = MCPClient({
+# 🛡️ Deadlines and jittered retries, so a dropped SSE stream doesn't end the agent run.
+# No hedging: the MCP client blocks, and a duplicate call can't be cancelled once it's running.
+policy = CallPolicy(hedge=False)
+# One tool call at a time per admitted agent run, on threads of their own
+tool_threads = BlockingCalls(ADMIT_CONCURRENCY)
+
+# ✅ Wrap .call to support kwargs → positional
+def wrap_tool_calls_positional(tools):
+    for tool in tools:
+        original_call = tool.call
+
+        def make_wrapped_call(_call, name):
+            def wrapped(*args, **kwargs):
+                with telemetry.span("tool_call", tool=name, source="remote") as span:
+                    positional = tuple(kwargs.values()) if kwargs and not args else args
+                    result = run_sync(policy.call(name, lambda: tool_threads.run(_call, *positional)))
+                    telemetry.record_bytes(
+                        name, telemetry.payload_bytes(kwargs or list(args)), telemetry.payload_bytes(result), span,
+                    )
+                    return result
+            return wrapped
+
+        tool.call = make_wrapped_call(original_call, tool.name)
+
+def connect_mcp():
+    # 🔌 Connect to MCP server (smolagents is imported here, not at startup)
+    from smolagents import MCPClient
+
+    return MCPClient({
         "url": MCP_SERVER_URL,
         "transport": "sse"
     })
 
-    tools = mcp_client.get_tools()
+def load_tools():
+    tools = mcp_client.get().get_tools()
     print("✅ Loaded tools from MCP server:")
     for tool in tools:
         print(f" - {tool.name}")
-
-    # ✅ Wrap .call to support kwargs → positional
-    def wrap_tool_calls_positional(tools):
-        for tool in tools:
-            original_call = tool.call
-
-            def make_wrapped_call(_call):
-                def wrapped(*args, **kwargs):
-                    if kwargs and not args:
-                        return _call(*kwargs.values())
-                    return _call(*args)
-                return wrapped
-
-            tool.call = make_wrapped_call(original_call)
-
     wrap_tool_calls_positional(tools)
+    return tools
 
+def load_model():
     # 🔐 Load OpenAI key
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
         raise EnvironmentError("❌ OPENAI_API_KEY not found in environment.")
 
     # 🧠 OpenAI model
-    model = OpenAIModel(
+    return OpenAIModel(
         api_key=openai_api_key,
         model="gpt-3.5-turbo"
     )
 
-    # 🤖 Agent with patched tools
-    agent = CodeAgent(tools=tools, model=model)
+# Built on first use; warm-up below builds them in the background once the UI is up
+mcp_client = Lazy(connect_mcp)
+tools = Lazy(load_tools)
+model = Lazy(load_model)
+readiness = Readiness()
+
+try:
+    # 🚦 Bounded scheduler: a spike of users queues (fairly, per session) or is told "busy" right away
+    admission = AdmissionController()
 
-    def agent_response(message, history):
+    def run_agent(message):
         try:
             print("📨 User message:", message)
-            message = (
-                "You are a RAG Evaluation Agent. Use the appropriate MCP tools like bm25_relevance_scorer to score relevance, "
-                "redundancy_checker for redundancy, or hallucination_checker for answer validation.\n\n"
-                + message
-            )
-            result = agent.run(message)
+            from smolagents import CodeAgent
+
+            with telemetry.request("test", model=model.get().model) as trace:
+                with trace.span("prompt_build"):
+                    message = (
+                        "You are a RAG Evaluation Agent. Use the appropriate MCP tools like bm25_relevance_scorer to score relevance, "
+                        "redundancy_checker for redundancy, or hallucination_checker for answer validation.\n\n"
+                        + message
+                    )
+                # 🤖 Agent with patched tools; one per request since agent memory isn't shareable
+                agent = CodeAgent(tools=tools.get(), model=model.get())
+                result = agent.run(message)
             print("✅ Agent response:", result)
             return str(result)
         except Exception as e:
@@ -115,6 +149,13 @@ try:
             traceback.print_exc()
             return f"❌ Error: {str(e)}"
 
+    # Native async handler: the blocking agent run happens off the event loop, once admitted
+    async def agent_response(message, history, request: gr.Request = None):
+        try:
+            return await run_async(admission.run(user_key(request), lambda: asyncio.to_thread(run_agent, message)))
+        except Busy as e:
+            return f"🚦 {e}"
+
     # 🎛️ Gradio UI
     demo = gr.ChatInterface(
         fn=agent_response,
@@ -125,10 +166,18 @@ try:
             "Evaluate the relevance of the following documents to the query 'What are the effects of turmeric on health?'\nDocuments:\n1. Turmeric contains curcumin, which has anti-inflammatory effects.\n2. Curcumin is an active ingredient that reduces joint pain.",
             "Check for redundancy in the following retrieved passages:\n1. Turmeric reduces inflammation.\n2. Turmeric is anti-inflammatory.\n3. It reduces swelling and inflammation.",
             "Use bm25_relevance_scorer with query 'What causes climate change?' and documents: 1. Greenhouse gases trap heat. 2. CO2 emissions have increased since the industrial era."
-        ]
+        ],
+        concurrency_limit=None,
     )
 
+    telemetry.start_metrics_server()
+    # The chat UI binds right away; the MCP connection, tool list and model load behind it
+    runtime.submit(readiness.run({
+        "mcp_tools": lambda: asyncio.to_thread(tools.get),
+        "llm_client": lambda: asyncio.to_thread(model.get),
+    }))
     demo.launch(share=True)
 
 finally:
-    mcp_client.disconnect()
+    if mcp_client.ready:
+        mcp_client.get().disconnect()
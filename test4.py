@@ -1,8 +1,9 @@
 import asyncio
 import os
-from mcp_playground import MCPClient, OpenAIBridge
+from mcp_playground import MCPClient
 from dotenv import load_dotenv
 from pprint import pprint
+from tool_loop import ParallelToolBridge
 
 load_dotenv()
 
@@ -10,8 +11,8 @@ async def main():
     # Connect to your MCP server
     client = MCPClient("https://d073d7a9000d02249b.gradio.live/gradio_api/mcp/sse")
 
-    # Set up OpenAI-powered agent
-    bridge = OpenAIBridge(
+    # Set up OpenAI-powered agent (runs every tool the model picks, concurrently)
+    bridge = ParallelToolBridge(
         client,
         api_key=os.environ.get("OPENAI_API_KEY"),
         model="gpt-4o"  # or "gpt-4", "gpt-3.5-turbo"
@@ -31,10 +32,12 @@ async def main():
     result = await bridge.process_query(message)
 
     # Check if a tool was used
-    if result["tool_call"]:
-        print(f"Tool: {result['tool_call']['name']}")
-        print(f"Result: {result['tool_result'].content}")
+    if result["tool_calls"]:
+        for outcome in result["tool_results"]:
+            print(f"Tool: {outcome['tool']}")
+            print(f"Result: {outcome['result'].content if 'result' in outcome else outcome['error']}")
         #pprint(result)
+        print(f"Summary: {result['response'].content}")
     else:
         print("No tool was called.")
         
@@ -1,10 +1,12 @@
 import os
 import asyncio
 import gradio as gr
-import ast
 from dotenv import load_dotenv
 from mcp_playground import MCPClient, OpenAIBridge
 
+import telemetry
+from result_decoder import ScoreResults, decode
+
 load_dotenv()
 
 # === MCP + OpenAI Setup ===
@@ -17,42 +19,49 @@ bridge = OpenAIBridge(client, api_key=OPENAI_KEY, model=OPENAI_MODEL)
 
 # === Async processing logic ===
 async def run_query_async(prompt: str) -> str:
-    try:
-        result = await bridge.process_query(prompt)
+    with telemetry.request("test5", model=OPENAI_MODEL) as trace:
+        try:
+            # OpenAIBridge makes the LLM decision and the tool call in one step
+            with trace.span("llm_decision", source="llm", model=OPENAI_MODEL):
+                result = await bridge.process_query(prompt)
+            telemetry.record_usage(OPENAI_MODEL, result.get("usage"))
 
-        if result.get("tool_call"):
-            tool = result["tool_call"]["name"]
-            raw_output = result["tool_result"].content
+            with trace.span("render"):
+                return render_result(result)
 
-            try:
-                # Clean and parse the Python-dict-style string
-                parsed = ast.literal_eval(raw_output.replace("root=", ""))
-                scores = parsed.get("results", [])
+        except Exception as e:
+            trace.status = "error"
+            return f"❌ Error: {str(e)}"
 
-                if not scores:
-                    return f"✅ **Tool Used:** `{tool}`\n\n⚠️ No relevance scores returned."
+def render_result(result) -> str:
+    if result.get("tool_call"):
+        tool = result["tool_call"]["name"]
+        raw_output = result["tool_result"].content
 
-                table = "\n".join([
-                    f"- **Doc {i+1}** — Score: `{r['score']}`\n  > {r['document']}"
-                    for i, r in enumerate(scores)
-                ])
+        # Typed decode: JSON / structured content, with a fallback for the legacy `root=` repr
+        parsed = decode(raw_output, tool)
+        if not isinstance(parsed, ScoreResults):
+            return f"✅ Tool: `{tool}`\n\n📦 Raw Output:\n```\n{raw_output}\n```"
 
-                return f"✅ **Tool Used:** `{tool}`\n\n📊 **Relevance Scores:**\n\n{table}"
+        if not parsed.documents:
+            return f"✅ **Tool Used:** `{tool}`\n\n⚠️ No relevance scores returned."
 
-            except Exception as parse_err:
-                return f"✅ Tool: `{tool}`\n\n📦 Raw Output:\n```\n{raw_output}\n```"
+        table = "\n".join([
+            f"- **Doc {i+1}** — Score: `{score}`\n  > {doc}"
+            for i, (doc, score) in enumerate(zip(parsed.documents, parsed.scores))
+        ])
 
-        else:
-            return f"🤖 GPT-4o Response (no tool used):\n\n{result['response'].content}"
+        return f"✅ **Tool Used:** `{tool}`\n\n📊 **Relevance Scores:**\n\n{table}"
 
-    except Exception as e:
-        return f"❌ Error: {str(e)}"
+    else:
+        return f"🤖 GPT-4o Response (no tool used):\n\n{result['response'].content}"
 
 # Sync wrapper for Gradio
 def run_query(prompt: str) -> str:
     return asyncio.run(run_query_async(prompt))
 
 # === Gradio App ===
+telemetry.start_metrics_server()
 gr.Interface(
     fn=run_query,
     inputs=gr.Textbox(lines=12, label="Enter your query + documents"),
@@ -1,8 +1,9 @@
 import asyncio
 import os
-from mcp_playground import MCPClient, OpenAIBridge
+from mcp_playground import MCPClient
 from dotenv import load_dotenv
 from pprint import pprint
+from tool_loop import ParallelToolBridge
 
 load_dotenv()
 
@@ -10,8 +11,8 @@ async def main():
     # Connect to your MCP server
     client = MCPClient("https://1f700a7c745593ccb7.gradio.live/gradio_api/mcp/sse")
 
-    # Set up OpenAI-powered agent
-    bridge = OpenAIBridge(
+    # Set up OpenAI-powered agent: every tool call in a turn runs, concurrently
+    bridge = ParallelToolBridge(
         client,
         api_key=os.environ.get("OPENAI_API_KEY"),
         model="gpt-4o"
@@ -55,13 +56,15 @@ Your response should reflect the tools used and the rationale behind your evalua
     # Process the query
     result = await bridge.process_query(message)
 
-    # Print result
-    if result.get("tool_call"):
-        print(f"✅ Tool: {result['tool_call']['name']}")
-        #print("📦 Tool Arguments:")
-        #pprint(result["tool_call"]["arguments"])
-        print("\n📊 Tool Result:")
-        pprint(result["tool_result"].content)
+    # Print result: one entry per tool the model called in its turn
+    if result["tool_calls"]:
+        for call, outcome in zip(result["tool_calls"], result["tool_results"]):
+            print(f"✅ Tool: {call['name']}")
+            #print("📦 Tool Arguments:")
+            #pprint(call["args"])
+            print("\n📊 Tool Result:")
+            pprint(outcome["result"].content if "result" in outcome else outcome["error"])
+        print("\n🤖 Summary:", result["response"].content)
     else:
         print("🤖 No tool was called.")
         print("Response:", result["response"].content)
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Busy
+
+
+def test_waiting_users_are_served_round_robin():
+    admission = AdmissionController(max_active=1, max_queue=10, per_user=5)
+    order = []
+
+    async def request(user, gate):
+        async with admission.slot(user):
+            order.append(user)
+            await gate.wait()
+
+    async def run():
+        gate = asyncio.Event()
+        holder = asyncio.ensure_future(request("holder", gate))
+        await asyncio.sleep(0)
+        # One user queues three requests before another queues one
+        waiting = [asyncio.ensure_future(request(user, gate)) for user in ("a", "a", "a", "b")]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(holder, *waiting)
+
+    asyncio.run(run())
+    assert order == ["holder", "a", "b", "a", "a"]
+    assert admission.stats()["peak_queue"] == 4
+
+
+def test_full_queue_and_per_user_limit_raise_busy():
+    admission = AdmissionController(max_active=1, max_queue=2, per_user=1)
+
+    async def run():
+        await admission.acquire("holder")
+        waiter = asyncio.ensure_future(admission.acquire("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(Busy, match="you already have 1"):
+            await admission.acquire("a")
+        other = asyncio.ensure_future(admission.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(Busy, match="already waiting"):
+            await admission.acquire("c")
+        for task in (waiter, other):
+            task.cancel()
+        await asyncio.gather(waiter, other, return_exceptions=True)
+
+    asyncio.run(run())
+    assert admission.rejected == 2
+    assert (admission.active, admission.queued) == (1, 0)
+
+
+def test_wait_timeout_rejects_and_stream_reports_busy():
+    admission = AdmissionController(max_active=1, max_queue=5, max_wait=0.01)
+
+    async def make():
+        yield "ok"
+
+    async def run():
+        await admission.acquire("holder")
+        return [item async for item in admission.stream("a", make)]
+
+    stages = asyncio.run(run())
+    assert stages == [("busy", "🚦 Busy: no slot freed up within 0.01s. Please retry shortly.")]
+    assert admission.queued == 0
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+from batch_eval import load_checkpoint, read_rows, run_batch
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_rows_are_written_once_and_failures_after_their_last_attempt(tmp_path):
+    out = tmp_path / "results.jsonl"
+    calls = {}
+
+    async def run_eval(query, documents, instruction):
+        calls[query] = calls.get(query, 0) + 1
+        if query == "flaky" and calls[query] == 1:
+            raise RuntimeError("transient")
+        if query == "broken":
+            raise RuntimeError("always")
+        return f"{query}|{documents}|{instruction}"
+
+    rows = [
+        ("0", {"query": "ok", "documents": ["a", "b"], "instruction": "score"}),
+        ("1", {"query": "flaky", "documents": "a", "task_instruction": "score"}),
+        ("2", {"query": "broken", "documents": "a", "instruction": "score"}),
+    ]
+    counts = asyncio.run(run_batch(rows, run_eval, str(out), concurrency=2, attempts=2))
+
+    assert (counts["ok"], counts["error"]) == (2, 1)
+    records = {r["id"]: r for r in _records(out)}
+    assert len(records) == 3
+    assert records["0"]["output"] == "ok|a\nb|score"
+    assert records["1"]["attempts"] == 2 and "error" not in records["1"]
+    assert records["2"] == {"id": "2", "query": "broken", "instruction": "score", "error": "always", "attempts": 2}
+
+
+def test_checkpoint_drops_errors_and_a_torn_last_line(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(
+        json.dumps({"id": "0", "output": "x"}) + "\n"
+        + json.dumps({"id": "1", "error": "boom"}) + "\n"
+        + json.dumps({"id": "2", "output": "y"}) + "\n"
+        + '{"id": "3", "outp'
+    )
+    assert load_checkpoint(str(out)) == {"0", "2"}
+    assert [r["id"] for r in _records(out)] == ["0", "2"]
+    assert not (tmp_path / "results.jsonl.tmp").exists()
+
+
+def test_resume_skips_finished_rows(tmp_path):
+    data = tmp_path / "rows.jsonl"
+    data.write_text("".join(json.dumps({"id": str(i), "query": f"q{i}"}) + "\n" for i in range(4)))
+    out = tmp_path / "results.jsonl"
+    out.write_text(json.dumps({"id": "0", "output": "x"}) + "\n" + json.dumps({"id": "1", "error": "boom"}) + "\n")
+    seen = []
+
+    async def run_eval(query, documents, instruction):
+        seen.append(query)
+        return query
+
+    counts = asyncio.run(run_batch(read_rows(str(data)), run_eval, str(out), done=load_checkpoint(str(out))))
+    assert counts["skipped"] == 1
+    assert sorted(seen) == ["q1", "q2", "q3"]
+    assert sorted(r["id"] for r in _records(out)) == ["0", "1", "2", "3"]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from call_policy import HEDGE_MIN_SAMPLES, CallPolicy, LatencyWindow, parse_deadlines
+
+
+def _policy(**kwargs):
+    options = {"deadlines": {}, "retries": 2, "backoff": 0.001, "hedge": False, "idempotent": {"score"}}
+    options.update(kwargs)
+    return CallPolicy(**options)
+
+
+def _attempts(*outcomes):
+    # Each attempt() pops the next outcome: an exception to raise, a delay to sleep, or a value
+    calls = []
+
+    def attempt():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+
+        async def run():
+            if isinstance(outcome, Exception):
+                raise outcome
+            if isinstance(outcome, float):
+                await asyncio.sleep(outcome)
+                return outcome
+            return outcome
+
+        return run()
+
+    return attempt, calls
+
+
+def test_parse_deadlines():
+    assert parse_deadlines("a=2, b=0.5,junk") == {"a": 2.0, "b": 0.5}
+
+
+def test_deadline_raises_a_named_timeout():
+    policy = _policy(deadlines={"score": 0.05})
+    attempt, _ = _attempts(1.0)
+    with pytest.raises(TimeoutError, match="score exceeded its 0.05s deadline"):
+        asyncio.run(policy.call("score", attempt))
+    assert policy.timeouts == 1
+
+
+def test_connection_errors_are_retried_for_idempotent_tools_only():
+    policy = _policy()
+    attempt, calls = _attempts(ConnectionError("reset"), "ok")
+    assert asyncio.run(policy.call("score", attempt)) == "ok"
+    assert len(calls) == 2 and policy.retried == 1
+
+    attempt, calls = _attempts(ConnectionError("reset"), "ok")
+    with pytest.raises(ConnectionError):
+        asyncio.run(policy.call("write", attempt))
+    assert len(calls) == 1
+
+
+def test_tool_errors_are_not_retried():
+    policy = _policy()
+    attempt, calls = _attempts(ValueError("bad args"), "ok")
+    with pytest.raises(ValueError):
+        asyncio.run(policy.call("score", attempt))
+    assert len(calls) == 1 and policy.failures == 1
+
+
+def test_slow_call_is_hedged_and_the_duplicate_wins():
+    policy = _policy(hedge=True)
+    window = policy.latencies.setdefault("score", LatencyWindow())
+    for _ in range(HEDGE_MIN_SAMPLES):
+        window.add(0.01)
+    attempt, calls = _attempts(1.0, "fast")
+    assert asyncio.run(policy.call("score", attempt)) == "fast"
+    assert len(calls) == 2
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
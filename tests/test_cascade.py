@@ -0,0 +1,60 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+
+from cascade import Cascade, prefilter
+from result_decoder import CascadeResults, decode
+
+DOCS = ["green tea leaves", "black tea", "coffee beans", "espresso machine", "tea ceremony"]
+
+
+class FakeClient:
+    handles = None
+
+    def __init__(self):
+        self.calls = []
+
+    async def invoke(self, tool, **kwargs):
+        self.calls.append((tool, kwargs))
+        # Reversed rows: the cascade must merge by document, not position
+        rows = [{"document": doc, "score": len(doc) / 100} for doc in reversed(kwargs["documents"])]
+        return SimpleNamespace(content=json.dumps({"results": rows}))
+
+
+def test_prefilter_keeps_document_order():
+    scores = np.array([0.5, 2.0, 0.0, 2.0, 1.0])
+    assert prefilter(scores, top_k=2).tolist() == [1, 3]
+    assert prefilter(scores, min_score=1.0).tolist() == [1, 3, 4]
+    assert prefilter(scores, top_k=2, min_score=2.5).tolist() == []
+
+
+def test_only_bm25_survivors_reach_the_semantic_scorer():
+    cascade = Cascade(top_k=3, min_docs=2)
+    client = FakeClient()
+
+    result = decode(asyncio.run(cascade.wrap(client).invoke("semantic_relevance_scorer", query="tea", documents=DOCS)).content)
+
+    _, sent = client.calls[0]
+    assert len(sent["documents"]) == 3 and "coffee beans" not in sent["documents"]
+    assert isinstance(result, CascadeResults)
+    assert result.documents == DOCS
+    for doc, score, stage in zip(result.documents, result.scores, result.stages):
+        if stage == "semantic":
+            assert score == round(len(doc) / 100, 4)
+        else:
+            assert score != score  # pruned: no semantic score
+    assert cascade.stats()["pruned"] == 2
+
+
+def test_small_sets_and_other_tools_pass_through():
+    cascade = Cascade(top_k=1, min_docs=10)
+    client = FakeClient()
+    session = cascade.wrap(client)
+
+    asyncio.run(session.invoke("semantic_relevance_scorer", query="tea", documents=DOCS))
+    asyncio.run(session.invoke("bm25_relevance_scorer", query="tea", documents=DOCS))
+    assert [kwargs["documents"] for _, kwargs in client.calls] == [DOCS, DOCS]
+    assert cascade.requests == 0
+    assert Cascade(top_k=0).wrap(client) is client
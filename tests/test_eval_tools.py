@@ -0,0 +1,46 @@
+import asyncio
+
+from eval_tools import collect_results, render_stages, stream_tool_plan
+
+
+async def _stages(*items):
+    for item in items:
+        yield item
+
+
+STAGES = (
+    ("plan", "plan"),
+    ("pending", "⏳ a", 0),
+    ("pending", "⏳ b", 1),
+    ("result", "b done", 1),
+    ("result", "a done", 0),
+    ("result", "summary text"),
+    ("summary", "done"),
+)
+
+
+def test_render_keeps_each_slot_in_place():
+    async def run():
+        return [output async for output in render_stages(_stages(*STAGES))]
+
+    outputs = asyncio.run(run())
+    assert outputs[3] == "plan\n\n⏳ a\n\nb done"
+    assert outputs[-1] == "plan\n\na done\n\nb done\n\nsummary text\n\ndone"
+
+
+def test_collect_orders_results_by_slot():
+    assert asyncio.run(collect_results(_stages(*STAGES))) == "a done\n\nb done\n\nsummary text"
+
+
+def test_tool_plan_streams_in_completion_order():
+    class Client:
+        async def invoke(self, tool, **kwargs):
+            await asyncio.sleep({"slow": 0.05, "fast": 0}[tool])
+            if tool == "fast":
+                raise ValueError("boom")
+            return tool
+
+    async def run():
+        return [pair async for pair in stream_tool_plan(Client(), ["slow", "fast"], "q", ["d"])]
+
+    assert asyncio.run(run()) == [(1, {"tool": "fast", "error": "boom"}), (0, {"tool": "slow", "result": "slow"})]
@@ -0,0 +1,22 @@
+from exact_match import AhoCorasick, ExactMatchIndex
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    assert AhoCorasick(["he", "she", "hers", "x"]).scan("ushers") == {0, 1, 2}
+
+
+def test_index_matches_substring_semantics():
+    docs = ["Green tea is good", "black tea", "green TEA"]
+    index = ExactMatchIndex(["green tea", "tea", ""], normalization=[])
+    assert index.match("green tea", docs) == [False, False, False]
+    assert index.match("tea", docs) == [True, True, False]
+    assert index.match("", docs) == [True, True, True]
+    assert not index.covers("coffee")
+
+
+def test_normalization_and_scan_reuse():
+    docs = ["Green  tea, is good", "black tea"]
+    index = ExactMatchIndex(["green tea"], normalization=["case", "whitespace", "punctuation"])
+    assert index.match("Green Tea", docs) == [True, False]
+    index.match_all(docs)
+    assert index.stats()["scans"] == 2
@@ -0,0 +1,54 @@
+import asyncio
+
+from fanout import run_plan, stream_plan
+
+
+def test_run_plan_keeps_order_and_reports_failures():
+    async def invoke(tool, args):
+        await asyncio.sleep(args["delay"])
+        if tool == "bad":
+            raise ValueError("boom")
+        return tool
+
+    calls = [
+        {"tool": "slow", "args": {"delay": 0.05}},
+        {"tool": "bad", "args": {"delay": 0}},
+        {"tool": "fast", "args": {"delay": 0}},
+    ]
+    assert asyncio.run(run_plan(calls, invoke)) == [
+        {"tool": "slow", "result": "slow"},
+        {"tool": "bad", "error": "boom"},
+        {"tool": "fast", "result": "fast"},
+    ]
+
+
+def test_run_plan_timeout():
+    async def invoke(tool, args):
+        await asyncio.sleep(1)
+
+    outcome, = asyncio.run(run_plan([{"tool": "slow"}], invoke, timeout=0.01))
+    assert outcome == {"tool": "slow", "error": "Timed out after 0.01s"}
+
+
+def test_run_plan_without_timeout_reports_the_invokers_deadline():
+    async def invoke(tool, args):
+        raise TimeoutError("slow exceeded its 5s deadline")
+
+    outcome, = asyncio.run(run_plan([{"tool": "slow"}], invoke, timeout=0))
+    assert outcome == {"tool": "slow", "error": "slow exceeded its 5s deadline"}
+
+
+def test_stream_plan_yields_in_completion_order():
+    async def invoke(tool, args):
+        await asyncio.sleep(args["delay"])
+        return tool
+
+    calls = [
+        {"tool": "slow", "args": {"delay": 0.05}},
+        {"tool": "fast", "args": {"delay": 0}},
+    ]
+
+    async def run():
+        return [pair async for pair in stream_plan(calls, invoke)]
+
+    assert asyncio.run(run()) == [(1, {"tool": "fast", "result": "fast"}), (0, {"tool": "slow", "result": "slow"})]
@@ -0,0 +1,25 @@
+from minhash import MinHashLSH, lsh_bands
+
+DOCS = [
+    "Green tea contains antioxidants that help reduce inflammation.",
+    "Black tea is made from fermented leaves and contains more caffeine.",
+    "Green tea contains antioxidants that help reduce inflammation!",
+    "It is commonly consumed in East Asia and has cultural significance.",
+]
+
+
+def test_near_duplicates_are_paired_and_clustered():
+    pairs, clusters = MinHashLSH(threshold=0.5).near_duplicates(DOCS)
+    assert [(i, j) for i, j, _ in pairs] == [(0, 2)]
+    assert pairs[0][2] == 1.0
+    assert clusters == [[0, 2]]
+
+
+def test_signatures_are_deterministic():
+    a, b = MinHashLSH(seed=3), MinHashLSH(seed=3)
+    assert (a.signature({1, 2, 3}) == b.signature({1, 2, 3})).all()
+
+
+def test_bands_cover_the_permutations():
+    bands, rows = lsh_bands(0.5, 128)
+    assert bands * rows <= 128
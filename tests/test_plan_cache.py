@@ -0,0 +1,24 @@
+from plan_cache import fill_plan, normalize_instruction, plan_template
+
+INPUTS = {"query": "green tea", "documents": "a\nb"}
+
+
+def test_template_round_trip_uses_the_new_inputs():
+    calls = [{"tool": "bm25_relevance_scorer", "args": {"query": "green tea", "docs": "a\nb"}}]
+    template = plan_template(calls, INPUTS)
+    assert template == [
+        {"tool": "bm25_relevance_scorer", "args": {"query": {"$input": "query"}, "docs": {"$input": "documents"}}},
+    ]
+    assert fill_plan(template, {"query": "coffee", "documents": "c"}) == [
+        {"tool": "bm25_relevance_scorer", "args": {"query": "coffee", "docs": "c"}},
+    ]
+
+
+def test_literal_arguments_are_not_memoized():
+    # e.g. a document the LLM copied from a truncated prompt
+    calls = [{"tool": "bm25_relevance_scorer", "args": {"query": "green tea", "docs": "a..."}}]
+    assert plan_template(calls, INPUTS) is None
+
+
+def test_instruction_normalization():
+    assert normalize_instruction("  Evaluate   for Redundancy!! ") == "evaluate for redundancy"
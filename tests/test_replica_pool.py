@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from replica_pool import ReplicaPool
+
+DOWN = set()
+
+
+class FakeSession:
+    def __init__(self, url):
+        self.url = url
+
+    async def invoke(self, tool, **kwargs):
+        if self.url in DOWN:
+            raise ConnectionError(f"{self.url} is down")
+        if tool == "bad":
+            raise ValueError("tool error")
+        return self.url
+
+    async def list_tools(self):
+        return await self.invoke("list")
+
+
+@pytest.fixture(autouse=True)
+def _servers_up():
+    DOWN.clear()
+    yield
+    DOWN.clear()
+
+
+def _pool(**kwargs):
+    return ReplicaPool(["a", "b"], size=1, factory=FakeSession, health_interval=60, **kwargs)
+
+
+def test_connection_failure_fails_over_and_ejects_the_replica():
+    pool = _pool(eject_after=1)
+    DOWN.add("a")
+
+    async def run():
+        return [await pool.invoke("score") for _ in range(4)]
+
+    assert asyncio.run(run()) == ["b"] * 4
+    a, b = pool.replicas
+    assert not a.healthy and a.ejections == 1 and b.healthy
+    assert pool.failovers == 1
+
+
+def test_tool_errors_go_back_to_the_caller_without_failover():
+    pool = _pool()
+
+    async def run():
+        with pytest.raises(ValueError):
+            await pool.invoke("bad")
+
+    asyncio.run(run())
+    assert pool.failovers == 0
+    assert all(replica.healthy for replica in pool.replicas)
+
+
+def test_health_probe_readmits_a_recovered_replica():
+    pool = _pool(eject_after=1)
+    DOWN.add("a")
+
+    async def run():
+        await pool.invoke("score")
+        a = pool.replicas[0]
+        await pool._probe(a)
+        assert not a.healthy
+        DOWN.clear()
+        await pool._probe(a)
+        pool._health_task.cancel()
+        return a
+
+    a = asyncio.run(run())
+    assert a.healthy and pool.readmissions == 1
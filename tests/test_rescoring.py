@@ -0,0 +1,60 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from rescoring import IncrementalScorer
+from result_decoder import decode
+
+
+class FakeClient:
+    handles = None
+    local = None
+
+    def __init__(self):
+        self.calls = []
+
+    async def invoke(self, tool, **kwargs):
+        self.calls.append((tool, kwargs))
+        if tool == "redundancy_checker":
+            return SimpleNamespace(content=json.dumps({"results": [], "clusters": []}))
+        # Rows come back in reverse order: merges must go by document, not position
+        rows = [{"document": doc, "score": float(len(doc))} for doc in reversed(kwargs["documents"])]
+        return SimpleNamespace(content=json.dumps({"results": rows}))
+
+
+def test_only_new_documents_are_sent_and_rows_merge_by_document():
+    client = FakeClient()
+    session = IncrementalScorer().session(client, "user")
+
+    async def run():
+        await session.invoke("semantic_relevance_scorer", query="q", documents=["a", "bbb"])
+        return await session.invoke("semantic_relevance_scorer", query="q", documents=["cc", "a", "bbb"])
+
+    result = decode(asyncio.run(run()).content)
+    assert list(result.scores) == [2.0, 1.0, 3.0]
+    assert client.calls[-1][1]["documents"] == ["cc"]
+
+
+def test_other_arguments_are_part_of_the_key():
+    client = FakeClient()
+    session = IncrementalScorer().session(client, "user")
+
+    async def run():
+        await session.invoke("redundancy_checker", docs=["a", "b"])
+        await session.invoke("redundancy_checker", docs=["a", "b"], threshold=0.9)
+        await session.invoke("redundancy_checker", docs=["b", "a"])
+
+    asyncio.run(run())
+    assert [kwargs.get("threshold") for _, kwargs in client.calls] == [None, 0.9]
+
+
+def test_rows_are_bounded_per_session():
+    client = FakeClient()
+    session = IncrementalScorer(max_rows=2).session(client, "user")
+    asyncio.run(session.invoke("semantic_relevance_scorer", query="q", documents=["a", "b", "c"]))
+    assert len(session.state.rows) == 2
+
+
+def test_anonymous_callers_get_the_client_unchanged():
+    client = FakeClient()
+    assert IncrementalScorer().session(client, "anonymous") is client
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from result_cache import ResultCache, cached_invoke, result_key
+
+
+def test_key_covers_server_tool_and_argument_order():
+    assert result_key("t", {"a": 1, "b": 2}) == result_key("t", {"b": 2, "a": 1})
+    assert result_key("t", {"a": 1}, url="http://one") != result_key("t", {"a": 1}, url="http://two")
+    assert result_key("t", {"a": 1}) != result_key("u", {"a": 1})
+
+
+def test_cached_invoke_calls_the_server_once(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+
+    async def invoke():
+        calls.append(1)
+        return SimpleNamespace(content=[{"type": "text", "text": "ok"}])
+
+    async def twice():
+        first = await cached_invoke(cache, "t", {"q": 1}, None, invoke, url="http://s")
+        second = await cached_invoke(cache, "t", {"q": 1}, None, invoke, url="http://s")
+        return first, second
+
+    first, second = asyncio.run(twice())
+    assert len(calls) == 1
+    assert second.content == first.content and second.cached
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_error_results_are_not_cached(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    cache.put("k1", "t", SimpleNamespace(content="boom", is_error=True))
+    cache.put("k2", "t", SimpleNamespace(content="boom", isError=True))
+    assert cache.get("k1") is None and cache.get("k2") is None
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=60, ttl=0)
+    cache.put("old", "t", {"v": "x" * 10})
+    cache.put("new", "t", {"v": "y" * 10})
+    cache.get("old")
+    cache.put("third", "t", {"v": "z" * 10})
+    assert cache.get("new") is None
+    assert cache.get("old") == {"v": "x" * 10}
+
+    expired = ResultCache(str(tmp_path / "ttl.sqlite"), ttl=0.01)
+    expired.put("k", "t", 1)
+    expired._db.execute("UPDATE results SET created = created - 1")
+    assert expired.get("k") is None
+
+
+def test_mcp_content_blocks_round_trip_as_data(tmp_path):
+    from mcp.types import CallToolResult, TextContent
+
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    cache.put("k", "t", CallToolResult(content=[TextContent(type="text", text='{"results": []}')]))
+    block, = cache.get("k").content
+    assert block["type"] == "text" and block["text"] == '{"results": []}'
@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+
+from result_decoder import MatchResults, RawResult, RedundancyResults, ScoreResults, decode
+
+
+def test_json_scores():
+    result = decode(json.dumps({"results": [{"document": "a", "score": 0.5}]}))
+    assert isinstance(result, ScoreResults)
+    assert result.to_dict() == {"results": [{"document": "a", "score": 0.5}]}
+
+
+def test_legacy_root_repr_and_content_blocks():
+    text = "root=" + repr({"results": [{"document": "a", "exact_match": True}]})
+    result = decode([SimpleNamespace(text=text)])
+    assert isinstance(result, MatchResults)
+    assert list(result.matches) == [True]
+
+
+def test_redundancy_keeps_clusters_and_approximate_flag():
+    payload = {
+        "results": [{"document_1": "a", "document_2": "b", "similarity": 0.9}],
+        "clusters": [[0, 1]],
+        "approximate": True,
+    }
+    result = decode(payload)
+    assert isinstance(result, RedundancyResults)
+    assert result.to_dict() == payload
+    assert result.render().startswith("≈ Approximate")
+
+
+def test_cascade_rows_keep_pruned_documents():
+    rows = [
+        {"document": "a", "score": 0.8, "stage": "semantic", "bm25": 2.0},
+        {"document": "b", "score": None, "stage": "bm25", "bm25": 0.1},
+    ]
+    result = decode({"results": rows})
+    assert result.stages == ["semantic", "bm25"]
+
+
+def test_unrecognised_text_is_raw():
+    result = decode("Error: tool crashed")
+    assert isinstance(result, RawResult)
+    assert result.render() == "Error: tool crashed"
+
+
+def test_empty_redundancy_result_is_not_a_missing_score():
+    # stub_mcp_server's redundancy_checker answers root={'results': []} when nothing overlaps
+    result = decode("root={'results': []}", "redundancy_checker")
+    assert isinstance(result, RedundancyResults)
+    assert result.render() == "✅ No redundant documents found."
+
+
+def test_empty_result_without_tool_is_neutral():
+    result = decode({"results": []})
+    assert result.to_dict() == {"results": []}
+    assert "No relevance scores" not in result.render()
+    assert isinstance(decode({"results": []}, "bm25_relevance_scorer"), ScoreResults)
+
+
+def test_cached_content_blocks_are_dicts():
+    text = json.dumps({"results": [{"document": "a", "score": 0.5}]})
+    result = decode([{"type": "text", "text": text}])
+    assert isinstance(result, ScoreResults)
@@ -0,0 +1,33 @@
+from router import InstructionRouter
+
+
+def test_stock_instructions_route_locally():
+    router = InstructionRouter()
+    assert router.route("Evaluate for redundancy").tools == ["redundancy_checker"]
+    assert router.route("Check for an exact match").tools == ["exact_match_checker"]
+    assert router.route("Evaluate the relevance of the documents").tools == [
+        "bm25_relevance_scorer", "semantic_relevance_scorer",
+    ]
+
+
+def test_specific_rule_suppresses_generic_relevance():
+    plan = InstructionRouter().route("Score semantic relevance")
+    assert plan.tools == ["semantic_relevance_scorer"]
+
+
+def test_free_form_and_negated_instructions_fall_back_to_the_llm():
+    router = InstructionRouter()
+    assert router.route("Tell me which passages a student should read first") is None
+    assert router.route("Check relevance but skip redundancy") is None
+    assert router.stats()["fallbacks"] == 2
+
+
+def test_adverbs_do_not_pick_tools():
+    plan = InstructionRouter().route("Tell me exactly how relevant these are")
+    assert "exact_match_checker" not in plan.tools
+
+
+def test_unrelated_tool_families_together_fall_back_to_the_llm():
+    router = InstructionRouter()
+    assert router.route("Check relevant documents for redundancy") is None
+    assert len(router.route("Run all evaluation tools").tools) == 4
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*[flight.do("k", fn) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_errors_reach_every_caller_and_the_key_is_released():
+    flight = SingleFlight("test")
+
+    async def fn():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    async def run():
+        outcomes = await asyncio.gather(flight.do("k", fn), flight.do("k", fn), return_exceptions=True)
+        assert not flight.in_flight("k")
+        return outcomes
+
+    assert [type(o) for o in asyncio.run(run())] == [ValueError, ValueError]
+
+
+def test_work_is_cancelled_only_when_every_caller_leaves():
+    flight = SingleFlight("test")
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def fn():
+            await gate.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("k", fn))
+        second = asyncio.ensure_future(flight.do("k", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        assert await second == "done"
+
+        gate.clear()
+        lone = asyncio.ensure_future(flight.do("j", fn))
+        await asyncio.sleep(0)
+        task = flight._calls["j"].task
+        lone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lone
+        await asyncio.sleep(0)
+        return task.cancelled()
+
+    assert asyncio.run(run())
+
+
+def test_stream_replays_items_to_late_joiners():
+    flight = SingleFlight("test")
+    made = []
+
+    async def make():
+        made.append(1)
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield i
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [item async for item in flight.stream("k", make)]
+
+    async def run():
+        return await asyncio.gather(collect(0), collect(0.015))
+
+    assert asyncio.run(run()) == [[0, 1, 2], [0, 1, 2]]
+    assert len(made) == 1
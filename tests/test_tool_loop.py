@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+from tool_loop import ParallelToolBridge, _function_schema
+
+
+def _parameters(tool):
+    return _function_schema(tool)["function"]["parameters"]
+
+
+def test_schema_attribute_spellings():
+    schema = {"type": "object", "properties": {"query": {"type": "string"}}}
+    assert _parameters(SimpleNamespace(name="a", inputSchema=schema)) == schema
+    assert _parameters(SimpleNamespace(name="b", input_schema=schema)) == schema
+    assert _parameters(SimpleNamespace(name="c")) == {"type": "object", "properties": {}}
+
+
+def test_parameter_lists_and_inputs_become_json_schema():
+    listed = SimpleNamespace(name="a", parameters=[
+        SimpleNamespace(name="query", type="string", description="Query", required=True),
+        SimpleNamespace(name="top_k", type="integer", description="Limit", required=False),
+    ])
+    assert _parameters(listed) == {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "Query"},
+            "top_k": {"type": "integer", "description": "Limit"},
+        },
+        "required": ["query"],
+    }
+    inputs = SimpleNamespace(name="b", inputs={"docs": {"type": "array", "description": "Documents"}})
+    assert _parameters(inputs)["required"] == ["docs"]
+
+
+class _LLM:
+    # Scripted chat.completions: picks two tools, then answers the follow-up turn
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+        self.requests = []
+
+    async def create(self, **request):
+        self.requests.append(request)
+        if len(self.requests) == 1:
+            calls = [
+                SimpleNamespace(id=f"call_{tool}", function=SimpleNamespace(name=tool, arguments='{"query": "q"}'))
+                for tool in ("slow", "fast")
+            ]
+            message = SimpleNamespace(content=None, tool_calls=calls)
+        else:
+            message = SimpleNamespace(content="summary", tool_calls=None)
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=message)])
+
+
+class _Client:
+    def __init__(self, tools):
+        self.tools = tools
+
+    async def list_tools(self):
+        return self.tools
+
+    async def invoke(self, tool, **kwargs):
+        await asyncio.sleep({"slow": 0.05, "fast": 0}[tool])
+        return SimpleNamespace(content=f"{tool} result")
+
+
+def _bridge(tools):
+    bridge = ParallelToolBridge(_Client(tools), api_key="test")
+    bridge.llm = _LLM()
+    return bridge
+
+
+def test_outcomes_stream_as_each_tool_finishes():
+    bridge = _bridge([SimpleNamespace(name="slow"), SimpleNamespace(name="fast")])
+
+    async def run():
+        return [event async for event in bridge.stream_query("evaluate")]
+
+    events = asyncio.run(run())
+    assert [event for event, _ in events] == ["calls", "outcome", "outcome", "result"]
+    assert [value[0] for event, value in events if event == "outcome"] == [1, 0]
+    result = events[-1][1]
+    assert [outcome["tool"] for outcome in result["tool_results"]] == ["slow", "fast"]
+    assert result["response"].content == "summary"
+
+
+def test_empty_catalog_sends_no_tools():
+    bridge = _bridge([])
+    asyncio.run(bridge.process_query("evaluate"))
+    assert "tools" not in bridge.llm.requests[0]
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+# Seconds a discovered tool list stays fresh
+TOOL_CATALOG_TTL = float(os.environ.get("TOOL_CATALOG_TTL", "300"))
+
+
+def _tool_schema(tool):
+    for attr in ("inputSchema", "input_schema", "parameters", "inputs"):
+        schema = getattr(tool, attr, None)
+        if schema is not None:
+            break
+    if isinstance(schema, list):
+        schema = [vars(p) if hasattr(p, "__dict__") else p for p in schema]
+    return schema
+
+
+def tool_fingerprint(tools):
+    """
+    Stable hash of tool names, descriptions and input schemas.
+    """
+    # Entries are sorted as JSON text: tuples holding schema dicts don't order when names tie
+    payload = sorted(
+        json.dumps([tool.name, getattr(tool, "description", "") or "", _tool_schema(tool)], sort_keys=True, default=str)
+        for tool in tools
+    )
+    blob = json.dumps(payload)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# Cached tool list with background refresh
+class ToolCatalog:
+    def __init__(self, client, ttl=None, adapt=None, refresh_ahead=0.8):
+        self.client = client
+        self.ttl = TOOL_CATALOG_TTL if ttl is None else ttl
+        self.adapt = adapt
+        self.refresh_ahead = refresh_ahead
+        self.fingerprint = None
+        self.hits = 0
+        self.refreshes = 0
+        self._url = getattr(client, "url", None)
+        self._tools = None
+        self._adapted = None
+        self._fetched_at = 0.0
+        self._refresh_task = None
+
+    def invalidate(self):
+        self._tools = None
+        self._adapted = None
+        self.fingerprint = None
+        self._fetched_at = 0.0
+
+    def set_url(self, url):
+        if url != self._url:
+            self._url = url
+            self.invalidate()
+
+    async def _refresh(self):
+        tools = await self.client.list_tools()
+        fingerprint = tool_fingerprint(tools or [])
+        if fingerprint != self.fingerprint:
+            # Only rebuild wrappers when the schemas actually changed
+            self._adapted = None
+            self.fingerprint = fingerprint
+        self._tools = tools
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        return tools
+
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        return self._refresh_task
+
+    async def tools(self):
+        self.set_url(getattr(self.client, "url", self._url))
+        age = time.monotonic() - self._fetched_at
+        if self._tools is None or age >= self.ttl:
+            return await self._start_refresh()
+        if age >= self.ttl * self.refresh_ahead:
+            # Serve the cached list while a fresh one is fetched
+            self._start_refresh()
+        self.hits += 1
+        return self._tools
+
+    async def adapted(self):
+        """
+        Tool wrappers built once per schema fingerprint and reused across requests.
+        """
+        tools = await self.tools()
+        if self._adapted is None:
+            self._adapted = [self.adapt(tool) for tool in tools] if self.adapt else list(tools)
+        return self._adapted
+
+    def stats(self):
+        return {
+            "tools": len(self._tools or []),
+            "fingerprint": self.fingerprint,
+            "age": time.monotonic() - self._fetched_at if self._tools is not None else None,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+        }
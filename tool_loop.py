@@ -0,0 +1,162 @@
+import json
+
+import telemetry
+from fanout import stream_plan
+from result_decoder import decode
+from tool_catalog import _tool_schema
+
+
+def _parameters(tool):
+    # Whatever shape the client reports (see tool_catalog._tool_schema), as a JSON Schema object
+    schema = _tool_schema(tool)
+    if isinstance(schema, list):
+        # Parameter objects: [{"name", "type", "description", "required"}, ...]
+        return {
+            "type": "object",
+            "properties": {
+                p["name"]: {k: v for k, v in p.items() if k in ("type", "description", "items", "enum")}
+                for p in schema if isinstance(p, dict) and "name" in p
+            },
+            "required": [p["name"] for p in schema if isinstance(p, dict) and p.get("required")],
+        }
+    if isinstance(schema, dict) and schema and "type" not in schema and "properties" not in schema:
+        # smolagents-style inputs: {name: {"type", "description"}}
+        return {"type": "object", "properties": schema, "required": [
+            name for name, spec in schema.items() if not (isinstance(spec, dict) and spec.get("nullable"))
+        ]}
+    return schema or {"type": "object", "properties": {}}
+
+
+def _function_schema(tool):
+    schema = _parameters(tool)
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": getattr(tool, "description", "") or "",
+            "parameters": schema,
+        },
+    }
+
+
+def _arguments(raw):
+    try:
+        args = json.loads(raw or "{}")
+    except json.JSONDecodeError:
+        return {}
+    return args if isinstance(args, dict) else {}
+
+
+def _tool_message(call, outcome):
+    # What the model sees in the follow-up turn: the rendered result, or why the call failed
+    if "error" in outcome:
+        content = f"Error: {outcome['error']}"
+    else:
+        content = decode(outcome["result"].content, call["name"]).render()
+    return {"role": "tool", "tool_call_id": call["id"], "content": content}
+
+
+def _add_usage(total, usage):
+    if usage is None:
+        return
+    total["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    total["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+
+# Drop-in for mcp_playground's OpenAIBridge that runs every tool call the model emits
+# in one turn. The calls run concurrently against the MCP client, and their results go
+# back in a single follow-up turn: one extra LLM round-trip however many tools were picked.
+class ParallelToolBridge:
+    def __init__(self, client, api_key=None, model="gpt-4o", follow_up=True, timeout=None):
+        from openai import AsyncOpenAI  # deferred like the other LLM clients: slow to import
+
+        self.client = client
+        self.model = model
+        self.follow_up = follow_up
+        # Per-call timeout for run_plan; 0 when the client's CallPolicy enforces the deadlines
+        self.timeout = timeout
+        self.llm = AsyncOpenAI(api_key=api_key)
+
+    async def process_query(self, message, trace=None, client=None, fix_args=None):
+        """
+        Returns {"response", "tool_calls", "tool_results", "usage"} plus the first call as
+        "tool_call" / "tool_result", the shape OpenAIBridge callers already read.
+        Each tool result is {"tool", "result"} or {"tool", "error"}, in the model's call order.
+        `client` overrides the bridge's client for this query (e.g. a Speculation).
+        `fix_args(tool, args)` returns corrected arguments before any call runs; the
+        follow-up turn sees the calls as they were actually made.
+        """
+        async for event, value in self.stream_query(message, trace, client, fix_args):
+            if event == "result":
+                result = value
+        return result
+
+    async def stream_query(self, message, trace=None, client=None, fix_args=None):
+        """
+        process_query as it happens: ("calls", calls) once the model has picked its tools,
+        ("outcome", (index, outcome)) as each call finishes, then ("result", what process_query returns).
+        """
+        client = client or self.client
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        messages = [{"role": "user", "content": message}]
+        tools = [_function_schema(tool) for tool in await client.list_tools()]
+        # The API rejects an empty tools list: with no catalog the model just answers
+        offer = {"tools": tools, "parallel_tool_calls": True} if tools else {}
+
+        with telemetry.span("llm_decision", trace, source="llm", model=self.model):
+            completion = await self.llm.chat.completions.create(model=self.model, messages=messages, **offer)
+        _add_usage(usage, completion.usage)
+        reply = completion.choices[0].message
+        calls = [
+            {"id": call.id, "name": call.function.name, "args": _arguments(call.function.arguments)}
+            for call in reply.tool_calls or []
+        ]
+        if fix_args is not None:
+            for call in calls:
+                call["args"] = fix_args(call["name"], call["args"])
+        if not calls:
+            yield "result", {"response": reply, "tool_calls": [], "tool_results": [], "tool_call": None, "usage": usage}
+            return
+
+        yield "calls", calls
+        outcomes = [None] * len(calls)
+        with telemetry.span("tool_execution", trace, tools=len(calls)):
+            async for i, outcome in stream_plan(
+                [{"tool": call["name"], "args": call["args"]} for call in calls],
+                lambda tool, args: client.invoke(tool, **args),
+                concurrency=len(calls), timeout=self.timeout,
+            ):
+                outcomes[i] = outcome
+                yield "outcome", (i, outcome)
+
+        response = reply
+        if self.follow_up:
+            messages.append({
+                "role": "assistant",
+                "content": reply.content,
+                "tool_calls": [
+                    {
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["name"], "arguments": json.dumps(call["args"])},
+                    }
+                    for call in calls
+                ],
+            })
+            messages.extend(_tool_message(call, outcome) for call, outcome in zip(calls, outcomes))
+            with telemetry.span("llm_followup", trace, model=self.model, tools=len(calls)):
+                completion = await self.llm.chat.completions.create(
+                    model=self.model, messages=messages, tools=tools, tool_choice="none",
+                )
+            _add_usage(usage, completion.usage)
+            response = completion.choices[0].message
+
+        first = next((i for i, outcome in enumerate(outcomes) if "result" in outcome), 0)
+        yield "result", {
+            "response": response,
+            "tool_calls": calls,
+            "tool_results": outcomes,
+            "tool_call": calls[first],
+            "tool_result": outcomes[first].get("result"),
+            "usage": usage,
+        }
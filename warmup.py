@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import telemetry
+
+
+# A value built on first use, so slow imports and connections stay off the startup path
+class Lazy:
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._built
+
+    def get(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._value = self.factory()
+                    self._built = True
+        return self._value
+
+
+# Background warm-up steps and whether the process is ready to serve at full speed yet
+class Readiness:
+    def __init__(self):
+        self.steps = {}
+        self.started = None
+        self.finished = None
+        telemetry.set_readiness(self)
+
+    @property
+    def ready(self):
+        return bool(self.steps) and all(step["state"] == "ok" for step in self.steps.values())
+
+    async def run(self, steps):
+        """
+        Runs {name: fn returning an awaitable} concurrently, recording each step's outcome.
+        A failed step is reported, not raised: handlers still connect lazily on first use.
+        """
+        self.started = time.monotonic()
+        for name in steps:
+            self.steps[name] = {"state": "pending", "seconds": None}
+        await asyncio.gather(*[self._step(name, fn) for name, fn in steps.items()])
+        self.finished = time.monotonic()
+
+    async def _step(self, name, fn):
+        started = time.monotonic()
+        try:
+            await fn()
+            self.steps[name] = {"state": "ok", "seconds": round(time.monotonic() - started, 3)}
+        except Exception as e:
+            self.steps[name] = {"state": "error", "seconds": round(time.monotonic() - started, 3), "error": str(e)}
+
+    def summary(self):
+        if not self.steps:
+            return "⏳ Warm-up not started"
+        if self.ready:
+            return f"✅ Ready (warm-up took {(self.finished or time.monotonic()) - self.started:.2f}s)"
+        icons = {"pending": "⏳", "ok": "✅", "error": "❌"}
+        return "⏳ Warming up: " + ", ".join(f"{name} {icons[step['state']]}" for name, step in self.steps.items())
+
+    def stats(self):
+        return {"ready": self.ready, "steps": self.steps}